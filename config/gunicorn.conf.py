@@ -0,0 +1,43 @@
+"""
+Настройки gunicorn для запуска в production (entrypoint.sh с APP_SERVER=wsgi или APP_SERVER=asgi).
+
+Количество процессов и потоков по умолчанию считается по числу CPU и переопределяется переменными окружения.
+Плавная перезагрузка: ``kill -HUP <pid мастера>`` запускает новые процессы и завершает старые после текущих
+запросов (не дольше GUNICORN_GRACEFUL_TIMEOUT секунд).
+"""
+
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# wsgi - процессы с потоками (gthread), asgi - процессы uvicorn с циклом событий (/task/events/ работает только в нём)
+if os.getenv("APP_SERVER", "wsgi") == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # Запросы обрабатываются в цикле событий, процесса на CPU достаточно
+    workers = int(os.getenv("WEB_CONCURRENCY", cpu_count))
+else:
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    # Процессы обходят GIL, потоки перекрывают ожидание базы внутри процесса
+    workers = int(os.getenv("WEB_CONCURRENCY", cpu_count * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Процесс, который не отвечает дольше timeout секунд, перезапускается
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Процессы перезапускаются после max_requests запросов (со случайным разбросом, чтобы не все сразу)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+# Приложение загружается в каждом процессе отдельно: соединения с базой не наследуются от мастера,
+# а HUP подхватывает новый код
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
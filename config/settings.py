@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "employee_tasks",
     "rest_framework",
     "corsheaders",
@@ -41,12 +42,23 @@ INSTALLED_APPS = [
     "drf_spectacular",
 ]
 
+# Рендерер JSON-ответов API: orjson (по умолчанию) или json - стандартный JSONRenderer DRF
+JSON_RENDERERS = {
+    "orjson": "employee_tasks.renderers.ORJSONRenderer",
+    "json": "rest_framework.renderers.JSONRenderer",
+}
+JSON_RENDERER = os.getenv("JSON_RENDERER", "orjson")
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        JSON_RENDERERS[JSON_RENDERER],
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "employee_tasks.authentication.CachedBasicAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -58,6 +70,10 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 MIDDLEWARE = [
+    # Первым, чтобы время запроса включало остальные промежуточные слои
+    "employee_tasks.instrumentation.RequestProfilingMiddleware",
+    # До остальных слоёв, чтобы сжимать их окончательный ответ
+    "employee_tasks.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,9 +112,34 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "PORT": os.getenv("DATABASE_PORT"),
         "HOST": "db",
+        # Соединение переиспользуется запросами этого потока CONN_MAX_AGE секунд (0 - новое на каждый запрос)
+        # и проверяется перед повторным использованием, поэтому перезапуск базы не приводит к ошибкам
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Реплики PostgreSQL только для чтения: DATABASE_REPLICA_HOSTS="host1:5432,host2" - алиасы replica_1, replica_2, ...
+# с теми же базой и пользователем. Чтение тяжёлых списков направляется на реплики (employee_tasks/routers.py)
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(",")), start=1):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        # В тестах реплика - та же тестовая база
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["employee_tasks.routers.PrimaryReplicaRouter"]
+
+# Допустимое отставание реплик в секундах: столько после изменения данных сотрудник читает с основной базы,
+# а ответы, прочитанные с реплики, не кешируются
+DATABASE_REPLICA_LAG = float(os.getenv("DATABASE_REPLICA_LAG", 5))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -140,6 +181,88 @@ CORS_ALLOWED_ORIGINS = ["http://127.0.0.1"]
 CSRF_TRUSTED_ORIGINS = ["http://127.0.0.1"]
 CORS_ALLOW_ALL_ORIGINS = False
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Кеш ответов списков сотрудников и задач (employee_tasks/cache.py). Локальный кеш у каждого процесса свой,
+    # при нескольких процессах нужен общий, например django.core.cache.backends.filebased.FileBasedCache
+    # с каталогом в RESPONSE_CACHE_LOCATION
+    "responses": {
+        "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "responses"),
+        "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000)),
+        },
+    },
+    # Кеш пользователей Basic-аутентификации (employee_tasks/authentication.py): LRU с ограничением числа записей
+    # и коротким временем жизни. Пароль и is_active сверяются с базой при каждом попадании, остальные изменения
+    # сотрудника в других процессах и в обход save() (queryset.update) видны после TIMEOUT
+    "auth": {
+        "BACKEND": os.getenv("AUTH_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("AUTH_CACHE_LOCATION", "auth"),
+        "TIMEOUT": int(os.getenv("AUTH_CACHE_TIMEOUT", 10)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # Закрепление сотрудника за основной базой после изменения данных (employee_tasks/routers.py). Следующий
+    # запрос может прийти в другой процесс, поэтому с DATABASE_REPLICA_HOSTS кеш должен быть общим для всех
+    # процессов, например django.core.cache.backends.db.DatabaseCache с таблицей REPLICA_PIN_CACHE_LOCATION
+    # (manage.py createcachetable); с локальным кешем приложение не запустится (проверка employee_tasks.E001)
+    "replica_pins": {
+        "BACKEND": os.getenv("REPLICA_PIN_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("REPLICA_PIN_CACHE_LOCATION", "replica_pins"),
+    },
+}
+
+# Изменения задач моложе этого количества секунд не отдаются в /task/changes/: транзакции, которые
+# фиксируются дольше, могут привести к пропуску изменений при синхронизации
+TASK_SYNC_LAG = float(os.getenv("TASK_SYNC_LAG", 5))
+
+# События задач для /task/events/: local - только в этом процессе, postgres - во всех процессах через
+# LISTEN/NOTIFY. Размер очереди событий одного подключения и интервал keep-alive в секундах
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "local")
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", 100))
+TASK_EVENTS_HEARTBEAT = float(os.getenv("TASK_EVENTS_HEARTBEAT", 15))
+
+# Максимальная глубина иерархии задач (цепочки parent_task)
+TASK_MAX_DEPTH = int(os.getenv("TASK_MAX_DEPTH", 50))
+
+# Сколько совпадений полнотекстового поиска ранжируется: для частых слов время ответа не растёт
+# с количеством найденных строк, ранжируются первые найденные
+SEARCH_RANK_LIMIT = int(os.getenv("SEARCH_RANK_LIMIT", 10000))
+
+# Профилирование запросов к API: доля профилируемых запросов (0 - выключено, 1 - все) и сколько самых медленных
+# запросов SQL записывать. Результат - заголовок Server-Timing и JSON-строка в журнале employee_tasks.profiling
+REQUEST_PROFILING_SAMPLE_RATE = float(os.getenv("REQUEST_PROFILING_SAMPLE_RATE", 0))
+REQUEST_PROFILING_SLOW_QUERIES = int(os.getenv("REQUEST_PROFILING_SLOW_QUERIES", 3))
+
+# Сжатие ответов (employee_tasks/compression.py): кодировки в порядке предпочтения сервера (пустое значение -
+# без сжатия), минимальный размер тела в байтах и уровни сжатия (см. README, раздел "Сжатие ответов")
+RESPONSE_COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()
+]
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+RESPONSE_COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", 6)),
+    "br": int(os.getenv("RESPONSE_COMPRESSION_BR_LEVEL", 4)),
+    "zstd": int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", 3)),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # Профили запросов пишутся в stderr (журнал контейнера) по одной JSON-строке
+        "employee_tasks.profiling": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Anna API employee_task_tracker",  # название проекта
     "VERSION": "0.0.1",  # версия проекта
@@ -5,7 +5,7 @@ from employee_tasks.models import Employee, Task
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
-    list_display = ("email", "first_name", "last_name", "position")
+    list_display = ("email", "first_name", "last_name", "position", "active_tasks_count")
     list_filter = ("last_name",)
 
 
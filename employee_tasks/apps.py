@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EmployeeTasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "employee_tasks"
+
+    def ready(self):
+        from employee_tasks import checks, signals  # noqa: F401
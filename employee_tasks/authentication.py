@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import BasicAuthentication
+
+# Алиас кеша аутентификации в settings.CACHES
+AUTH_CACHE_ALIAS = "auth"
+
+AUTH_GENERATION_KEY = "auth:generation"
+
+
+def auth_cache():
+    return caches[AUTH_CACHE_ALIAS]
+
+
+def get_auth_generation():
+    return auth_cache().get_or_set(AUTH_GENERATION_KEY, time.time_ns, None)
+
+
+def bump_auth_generation():
+    """Делает недействительными все запомненные пользователи: они хранятся под ключами текущего поколения"""
+    cache = auth_cache()
+    try:
+        cache.incr(AUTH_GENERATION_KEY)
+    except ValueError:
+        # Поколения нет (первое обращение или вытеснено): начинаем со значения, которого ещё не было
+        cache.set(AUTH_GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_auth_cache():
+    """Сбрасывает кеш аутентификации после изменения сотрудника.
+
+    Поколение увеличивается сразу и ещё раз после фиксации транзакции: иначе запрос, прочитавший сотрудника
+    до фиксации (со старым паролем), успел бы запомнить его под новым поколением.
+    """
+    bump_auth_generation()
+    transaction.on_commit(bump_auth_generation)
+
+
+def is_current(user):
+    """Запомненный пользователь не устарел: хеш пароля и is_active в базе те же, что в кеше.
+
+    Сброс поколения виден только процессам с общим кешем, поэтому учётные данные сверяются с базой при каждом
+    попадании в кеш одним запросом двух столбцов по первичному ключу: смена пароля, деактивация и удаление
+    сотрудника действуют сразу во всех процессах. Дорогая проверка пароля (PBKDF2) по-прежнему выполняется
+    только при промахе.
+    """
+    current = type(user)._default_manager.filter(pk=user.pk).values_list("password", "is_active").first()
+    return current == (user.password, user.is_active)
+
+
+def auth_cache_key(kind, *credentials):
+    """Ключ пользователя: поколение и HMAC учётных данных (сами пароли и токены в кеше не хранятся).
+
+    Поколение читается до проверки учётных данных, поэтому пользователь, прочитанный до изменения,
+    сохраняется под старым поколением и больше не используется.
+    """
+    message = "\0".join(str(credential) for credential in credentials).encode()
+    digest = hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+    return f"auth:{get_auth_generation()}:{kind}:{digest}"
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """Basic-аутентификация, которая запоминает пользователя для пары почта и пароль.
+
+    Проверка пароля (PBKDF2) выполняется только при первом запросе с этими учётными данными или после сброса
+    кеша: изменение или удаление сотрудника (пароль, is_active) сбрасывает его сигналом, а в других процессах
+    запомненный пользователь не используется после сверки с базой (is_current). Неудачные попытки не запоминаются.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache = auth_cache()
+        key = auth_cache_key("basic", userid, password)
+        user = cache.get(key)
+        if user is None or not is_current(user):
+            user, _ = super().authenticate_credentials(userid, password, request)
+            cache.set(key, user)
+        return user, None
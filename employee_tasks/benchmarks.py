@@ -0,0 +1,88 @@
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+# Почта сотрудников синтетических данных seed_bench: bench-<номер>@example.com
+BENCH_EMAIL_PREFIX = "bench-"
+BENCH_EMAIL = BENCH_EMAIL_PREFIX + "{}@example.com"
+
+# Допустимое ухудшение метрик относительно базовой линии (доля)
+BENCH_TOLERANCE = 0.25
+
+# Изменения времени ответа меньше этого (мс) не считаются ухудшением: они в пределах шума измерений
+BENCH_MIN_REGRESSION_MS = 1.0
+
+# Метрики времени ответа, которые сравниваются с базовой линией (p99 на десятках запросов - это шум)
+LATENCY_METRICS = ("p50_ms", "p95_ms")
+
+
+def percentile(values, percentile):
+    """Перцентиль отсортированного списка значений (метод ближайшего ранга)"""
+    return values[min(len(values) - 1, len(values) * percentile // 100)]
+
+
+def response_rows(response):
+    """Количество строк в ответе: элементы страницы или списка, для остальных ответов - одна строка"""
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return len(data["results"])
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+# Время ответа, количество запросов к базе и строк одного запроса к API
+Sample = namedtuple("Sample", "elapsed queries rows")
+
+
+def measure(send):
+    """Выполняет запрос send() и возвращает ответ и Sample; запросы считаются во всех базах (и репликах)"""
+    with ExitStack() as stack:
+        captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+    queries = sum(len(context) for context in captured)
+    return response, Sample(elapsed, queries, response_rows(response))
+
+
+def summarize(samples):
+    """Метрики сценария: перцентили времени ответа, медиана количества запросов и строки в секунду"""
+    latencies = sorted(sample.elapsed for sample in samples)
+    queries = sorted(sample.queries for sample in samples)
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries": percentile(queries, 50),
+        "rows_per_second": round(sum(sample.rows for sample in samples) / max(sum(latencies), 1e-9), 1),
+    }
+
+
+def find_regressions(results, baseline, tolerance=BENCH_TOLERANCE):
+    """Ухудшения метрик сценариев results относительно baseline.
+
+    Время ответа - больше чем на tolerance и на BENCH_MIN_REGRESSION_MS, строки в секунду - меньше чем
+    на tolerance, количество запросов к базе - любое увеличение. Сценарии, которых нет в базовой линии,
+    не сравниваются.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if (
+                metrics[metric] > base[metric] * (1 + tolerance)
+                and metrics[metric] - base[metric] > BENCH_MIN_REGRESSION_MS
+            ):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {metrics[metric]}")
+        if metrics["rows_per_second"] < base["rows_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: rows_per_second {base['rows_per_second']} -> {metrics['rows_per_second']}")
+        if metrics["queries"] > base["queries"]:
+            regressions.append(f"{name}: queries {base['queries']} -> {metrics['queries']}")
+    return regressions
@@ -0,0 +1,142 @@
+import hashlib
+from functools import cached_property
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from rest_framework.response import Response
+
+from employee_tasks.models import DataVersion
+
+# Алиас кеша ответов в settings.CACHES
+RESPONSE_CACHE_ALIAS = "responses"
+
+HITS_KEY = "response:hits"
+MISSES_KEY = "response:misses"
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def increment(key):
+    """Увеличивает счётчик в кеше, создавая его при отсутствии. Возвращает новое значение"""
+    cache = response_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Счётчика нет (первое обращение или вытеснен)
+        cache.set(key, 1, None)
+        return 1
+
+
+def response_cache_stats():
+    """Количество попаданий и промахов кеша ответов"""
+    stats = response_cache().get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": stats.get(HITS_KEY, 0), "misses": stats.get(MISSES_KEY, 0)}
+
+
+def response_cache_key(request, version):
+    """Ключ ответа: версия данных, адрес запроса и отсортированные параметры (в том числе страница)"""
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f"{request.build_absolute_uri(request.path)}?{query}"
+    return f"response:{version}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+class DataVersionMixin:
+    """Версия данных задач и сотрудников (``DataVersion``) для кеша и условных GET представления"""
+
+    @cached_property
+    def data_version(self):
+        """Версия из базы, из которой читает представление: читается один раз и до самих данных, поэтому данные
+        ответа не старее версии"""
+        return DataVersion.objects.using(getattr(self, "read_database", DEFAULT_DB_ALIAS)).current()
+
+
+class ResponseCacheMixin(DataVersionMixin):
+    """Кеширует данные ответов списков из ``cached_actions``.
+
+    Версия данных входит в ключ, а триггеры базы меняют её при любом изменении задач или сотрудников (из любого
+    процесса и в обход сигналов), поэтому старые ответы больше не читаются и вытесняются кешем по ограничению
+    MAX_ENTRIES или TIMEOUT. В заголовке ``X-Cache`` - HIT или MISS.
+    """
+
+    cached_actions = ()
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.cached_actions or self.data_version is None:
+            return super().list(request, *args, **kwargs)
+
+        cache = response_cache()
+        key = response_cache_key(request, self.data_version)
+        data = cache.get(key)
+        if data is not None:
+            increment(HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        increment(MISSES_KEY)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin(DataVersionMixin):
+    """Условные GET для действий (retrieve и списков) из ``conditional_actions``.
+
+    ETag списков считается по версии данных, ETag и Last-Modified объекта - по его updated_at, поэтому
+    на If-None-Match/If-Modified-Since ответ 304 отдаётся одним запросом, до выборки и сериализации данных.
+    Списки не отдают Last-Modified: удаление строки не меняет время последнего изменения оставшихся.
+    """
+
+    conditional_actions = ()
+
+    def get_validators(self):
+        """Версия ответа и время его последнего изменения (None, если его нет). Версия None - сравнивать не с чем"""
+        if self.action != "retrieve":
+            return self.data_version, None
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            # Ключ неверного типа (например, /task/abc/): проверять нечего, retrieve ответит 404
+            return None, None
+        updated_at = queryset.values_list("updated_at", flat=True).first()
+        return updated_at, updated_at
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, view, request, *args, **kwargs):
+        version, last_modified = self.get_validators()
+        if version is None:
+            # Объекта нет (будет 404) или версии данных ещё нет: сравнивать не с чем
+            return view(request, *args, **kwargs)
+
+        # Ответ зависит ещё от адреса с параметрами (страница, фильтры) и формата
+        parts = [str(version), request.get_full_path(), request.accepted_renderer.format]
+        etag = f'"{hashlib.md5("|".join(parts).encode()).hexdigest()}"'
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
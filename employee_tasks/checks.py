@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from employee_tasks.routers import REPLICA_PIN_CACHE_ALIAS
+
+# Бэкенды кеша, которые не видны другим процессам: закрепление за основной базой в них не работает
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """С репликами закрепление сотрудника за основной базой должно храниться в общем для всех процессов кеше.
+
+    Иначе следующий запрос сотрудника, пришедший в другой процесс gunicorn, не увидит закрепления и прочитает
+    с реплики данные без его изменений.
+    """
+    backend = settings.CACHES.get(REPLICA_PIN_CACHE_ALIAS, {}).get("BACKEND")
+    if not settings.DATABASE_REPLICAS or backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            f"С DATABASE_REPLICA_HOSTS кеш {REPLICA_PIN_CACHE_ALIAS} не может быть локальным для процесса ({backend})",
+            hint=(
+                "Задайте REPLICA_PIN_CACHE_BACKEND с общим для всех процессов кешем, например "
+                "django.core.cache.backends.db.DatabaseCache (таблица создаётся командой createcachetable)"
+            ),
+            id="employee_tasks.E001",
+        )
+    ]
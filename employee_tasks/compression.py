@@ -0,0 +1,171 @@
+import zlib
+
+import brotli
+import zstandard
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+# Типы содержимого, которые сжимаются: JSON, NDJSON, CSV, схема OpenAPI и страницы просматриваемого API
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/vnd.oai.openapi", "text/")
+
+# Поток событий не сжимается: события маленькие и должны доходить до клиента сразу
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class GzipCodec:
+    """Кодек сжатия: compress - тело целиком, stream - функции сжатия части потока и завершения потока.
+
+    Каждая часть потока сжимается со сбросом буфера, чтобы сразу уйти клиенту.
+    """
+
+    name = "gzip"
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        # wbits 31 - формат gzip с заголовком; без времени в заголовке одинаковые ответы сжимаются одинаково
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class BrotliCodec:
+    """Кодек brotli (см. GzipCodec)"""
+
+    name = "br"
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=self.level)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+
+class ZstdCodec:
+    """Кодек zstd (см. GzipCodec)"""
+
+    name = "zstd"
+
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def stream(self):
+        compressor = self.compressor.compressobj()
+        flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return lambda chunk: compressor.compress(chunk) + compressor.flush(flush_block), compressor.flush
+
+
+CODECS = {codec.name: codec for codec in (GzipCodec, BrotliCodec, ZstdCodec)}
+
+
+def get_codecs():
+    """Кодеки RESPONSE_COMPRESSION_ENCODINGS в порядке предпочтения сервера с уровнями RESPONSE_COMPRESSION_LEVELS"""
+    levels = settings.RESPONSE_COMPRESSION_LEVELS
+    return [CODECS[name](levels[name]) for name in settings.RESPONSE_COMPRESSION_ENCODINGS]
+
+
+def parse_accept_encoding(header):
+    """Кодировки из заголовка Accept-Encoding с весами q: {"gzip": 1.0, "br": 0.5, "*": 0.0}"""
+    weights = {}
+    for item in header.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    return weights
+
+
+def choose_codec(codecs, header):
+    """Кодек с наибольшим весом в Accept-Encoding (при равных весах - по порядку codecs) или None"""
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for codec in codecs:
+        weight = weights.get(codec.name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы кодировкой, которую клиент принимает (Accept-Encoding): zstd, br или gzip.
+
+    Кодировки и уровни сжатия - RESPONSE_COMPRESSION_ENCODINGS и RESPONSE_COMPRESSION_LEVELS. Обычные ответы
+    меньше RESPONSE_COMPRESSION_MIN_SIZE байт и ответы, которые не стали меньше, отдаются как есть. Потоковые
+    ответы (выгрузки) сжимаются по частям: каждая часть отправляется клиенту сразу, не дожидаясь следующей.
+    Как и GZipMiddleware Django, делает ETag слабым: сжатое тело не совпадает байт в байт с исходным.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding") or not is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        codec = choose_codec(get_codecs(), request.headers.get("Accept-Encoding", ""))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_stream(codec, response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            content = codec.compress(response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = codec.name
+        return response
+
+    @staticmethod
+    def compress_stream(codec, chunks):
+        compress, finish = codec.stream()
+        for chunk in chunks:
+            if chunk:
+                yield compress(chunk)
+        yield finish()
+
+    @staticmethod
+    async def compress_async_stream(codec, chunks):
+        compress, finish = codec.stream()
+        async for chunk in chunks:
+            if chunk:
+                yield compress(chunk)
+        yield finish()
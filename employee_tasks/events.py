@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from employee_tasks.models import TASK_COUNTER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Канал PostgreSQL NOTIFY, через который события доходят до всех процессов
+EVENTS_CHANNEL = "employee_tasks_events"
+
+# Событие для клиента, который не успевал читать поток: часть событий потеряна, данные нужно перечитать
+RESET_MESSAGE = "event: reset\ndata: {}\n\n"
+
+
+class EventStreamUnavailable(APIException):
+    """Поток событий без ASGI-сервера: WSGI-сервер собрал бы бесконечный асинхронный поток в список,
+    и запрос занял бы поток сервера навсегда, не отправив клиенту ни одного события"""
+
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Поток событий доступен только при запуске под ASGI-сервером (APP_SERVER=asgi)"
+    default_code = "event_stream_unavailable"
+
+
+def format_event(event, data):
+    """Событие в формате text/event-stream"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+
+
+class Subscription:
+    """Очередь событий одного подключения.
+
+    Очередь ограничена settings.TASK_EVENTS_QUEUE_SIZE: если клиент не успевает читать, накопленные события
+    выбрасываются и вместо них отправляется reset, поэтому медленный клиент не копит память и не тормозит
+    остальных.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+
+    def push(self, message):
+        """Добавляет событие в очередь; вызывается только в цикле событий подписки"""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESET_MESSAGE
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """Следующее событие или None, если за timeout секунд событий не было"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Рассылает события подпискам этого процесса.
+
+    Событие форматируется один раз и передаётся в циклы событий подписок через call_soon_threadsafe, поэтому
+    рассылка не делает запросов к базе и может вызываться из любого потока.
+    """
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def subscribe(self):
+        if settings.TASK_EVENTS_BACKEND == "postgres":
+            self.start_listener()
+        subscription = Subscription()
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, message)
+            except RuntimeError:
+                # Цикл событий подписки уже закрыт
+                self.unsubscribe(subscription)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = PostgresListener(self)
+                self.listener.start()
+
+
+class PostgresListener(threading.Thread):
+    """Поток, который слушает канал PostgreSQL (LISTEN) и передаёт события брокеру процесса.
+
+    На процесс открывается одно отдельное соединение с базой, независимо от количества подписок.
+    """
+
+    poll_timeout = 5
+
+    def __init__(self, broker):
+        super().__init__(name="task-events-listener", daemon=True)
+        self.broker = broker
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception("Потеряно соединение для событий задач, переподключение")
+                time.sleep(self.poll_timeout)
+
+    def listen(self):
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+            while True:
+                if select.select([connection], [], [], self.poll_timeout)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        self.broker.dispatch(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+broker = EventBroker()
+
+
+def send(message):
+    """Отправляет готовое событие всем подпискам: через NOTIFY или напрямую брокеру этого процесса"""
+    if settings.TASK_EVENTS_BACKEND == "postgres":
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [EVENTS_CHANNEL, message])
+    else:
+        broker.dispatch(message)
+
+
+def publish(event, data):
+    """Публикует событие после фиксации текущей транзакции"""
+    message = format_event(event, data)
+    transaction.on_commit(lambda: send(message))
+
+
+def publish_reset():
+    """Сообщает клиентам, что данные изменились массово и их нужно перечитать"""
+    transaction.on_commit(lambda: send(RESET_MESSAGE))
+
+
+def workload_deltas(old, new):
+    """Изменения счётчиков задач сотрудников при переходе задачи из (статус, сотрудник) old в new"""
+    deltas = {}
+    for workload, sign in ((old, -1), (new, 1)):
+        if workload is None or workload[1] is None:
+            continue
+        status, employee_id = workload
+        field = TASK_COUNTER_FIELDS[status]
+        employee_deltas = deltas.setdefault(employee_id, {})
+        employee_deltas[field] = employee_deltas.get(field, 0) + sign
+    return {
+        employee_id: {field: delta for field, delta in employee_deltas.items() if delta}
+        for employee_id, employee_deltas in deltas.items()
+        if any(employee_deltas.values())
+    }
+
+
+def publish_task_change(action, task, old=None, new=None):
+    """Публикует событие task (created/updated/deleted) и workload для сотрудников с изменёнными счётчиками.
+
+    Данные берутся из самой задачи без запросов к базе; описание задачи не передаётся (NOTIFY ограничивает
+    размер сообщения), клиент при необходимости загружает задачу сам.
+    """
+    task_data = {
+        "id": task.pk,
+        "title_task": task.title_task,
+        "employee": task.employee_id,
+        "parent_task": task.parent_task_id,
+        "status": task.status,
+        "deadline": task.deadline,
+        "updated_at": task.updated_at,
+    }
+    publish("task", {"action": action, "task": task_data})
+    for employee_id, deltas in workload_deltas(old, new).items():
+        publish("workload", {"employee": employee_id, "deltas": deltas})
+
+
+async def stream_events():
+    """Поток text/event-stream для одного подключения с комментарием keep-alive при отсутствии событий"""
+    subscription = broker.subscribe()
+    try:
+        yield ": connected\n\n"
+        while True:
+            message = await subscription.get(settings.TASK_EVENTS_HEARTBEAT)
+            yield message if message is not None else ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,65 @@
+from functools import cached_property
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsetMixin:
+    """Параметры fields= и exclude= (имена полей через запятую) сужают ответы действий из ``sparse_actions``.
+
+    Сужаются и поля сериализатора (``SparseFieldsetSerializerMixin``), и запрос к базе. Списки из
+    ``values_actions`` всегда читаются через .values() только нужных столбцов и сериализуются без создания
+    моделей (быстрый путь ``TaskListSerializer``), остальные действия с параметрами читают модели через .only().
+    """
+
+    sparse_actions = ()
+    values_actions = ()
+
+    @cached_property
+    def sparse_fields(self):
+        """Имена полей ответа в порядке сериализатора или None, если ответ не сужается"""
+        if self.request is None or self.request.method not in SAFE_METHODS or self.action not in self.sparse_actions:
+            return None
+        params = self.request.query_params
+        if "fields" not in params and "exclude" not in params:
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        fields = self.parse_fields("fields", available) if "fields" in params else available
+        excluded = self.parse_fields("exclude", available) if "exclude" in params else []
+        fields = [name for name in available if name in fields and name not in excluded]
+        if not fields:
+            raise ValidationError({"fields": "Не осталось ни одного поля"})
+        return fields
+
+    def parse_fields(self, param, available):
+        names = [name.strip() for name in self.request.query_params[param].split(",") if name.strip()]
+        if not names:
+            raise ValidationError({param: "Укажите имена полей через запятую"})
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({param: f"Неизвестные поля: {', '.join(unknown)}"})
+        return names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.sparse_fields is not None:
+            context["fields"] = self.sparse_fields
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return queryset
+        if self.action in self.values_actions:
+            return queryset.values(*self.get_columns(queryset))
+        if self.sparse_fields is not None:
+            return queryset.only(*self.get_columns(queryset))
+        return queryset
+
+    def get_columns(self, queryset):
+        """Столбцы модели для полей ответа, первичного ключа и сортировки курсорной пагинации"""
+        columns = [column for _, column, _ in self.get_serializer().value_columns()]
+        columns.append(queryset.model._meta.pk.attname)
+        columns += [field.lstrip("-") for field in getattr(self, "cursor_ordering", ())]
+        return list(dict.fromkeys(columns))
@@ -1,31 +1,116 @@
+import re
+
 import django_filters
+from django import forms
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import BooleanField, F, Func
+from rest_framework.filters import BaseFilterBackend
+
+from employee_tasks.models import EMPLOYEE_SEARCH_CONFIG, TASK_SEARCH_CONFIG, Employee, Task
+from employee_tasks.services import assign_tasks
+
+# Слова поискового запроса по префиксу: буквы и цифры без знаков, которые имеют смысл в синтаксисе tsquery
+SEARCH_WORD = re.compile(r"[^\W_]+")
+
+
+class AnyOf(Func):
+    """Условие ``выражение = ANY(массив)``.
+
+    В отличие от ``IN (подзапрос)`` массив вычисляется один раз до основного запроса, и строки читаются
+    по индексу, а не соединением со всей таблицей.
+    """
 
-from employee_tasks.models import Employee, Task
+    arg_joiner = " = ANY("
+    template = "%(expressions)s)"
+    output_field = BooleanField()
+
+
+class IntegerInFilter(django_filters.BaseInFilter):
+    """Список целых чисел через запятую; иначе - ошибка 400"""
+
+    field_class = forms.IntegerField
 
 
 class EmployeeTaskFilter(django_filters.FilterSet):
     """Фильтр для сотрудников"""
-    task_id = django_filters.BaseInFilter(field_name="task__id")
+    task_id = IntegerInFilter(field_name="task__id")
 
     class Meta:
         model = Employee
         fields = ["task_id"]
 
     def filter_queryset(self, queryset):
-        task_ids = self.data.get("task_id", None)
+        task_ids = self.form.cleaned_data.get("task_id")
 
         if task_ids:
-            task_id_list = [int(i) for i in task_ids.split(",")]
+            recommendations = assign_tasks(Task.objects.filter(id__in=task_ids))
 
-            empl_with_small_count_tasks = queryset.order_by("-active_tasks_count")[:1]
+            return queryset.filter(id__in={recommendation["employee_id"] for recommendation in recommendations})
 
-            parent_tasks = Task.objects.filter(id__in=task_id_list).values_list("parent_task_id", flat=True)
+        return queryset
 
-            parent_tasks_empl = queryset.filter(
-                task__id__in=parent_tasks,
-                active_tasks_count__lte=empl_with_small_count_tasks.first().active_tasks_count + 2,
-            )[:1]
 
-            return parent_tasks_empl or empl_with_small_count_tasks
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ``?search=`` по столбцу ``search_vector`` с сортировкой по релевантности.
 
-        return queryset
+    Совпадения выбираются по GIN-индексу столбца, ранг (ts_rank) считается не больше чем для SEARCH_RANK_LIMIT
+    из них: иначе слово, которое есть в большинстве строк, ранжировало бы всю таблицу. Для таких слов результаты
+    и их количество ограничены первыми найденными строками. Курсорная пагинация сортирует результаты
+    по своим полям, а не по рангу.
+    """
+
+    search_param = "search"
+    search_config = "simple"
+    search_description = "Слова для полнотекстового поиска"
+
+    def get_search_query(self, text):
+        """Запрос в синтаксисе веб-поиска: слова, "фраза", or, -исключение"""
+        return SearchQuery(text, search_type="websearch", config=self.search_config)
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+
+        query = self.get_search_query(text)
+        if query is None:
+            return queryset.none()
+        matches = queryset.filter(search_vector=query).order_by().values("pk")[: settings.SEARCH_RANK_LIMIT]
+        return (
+            queryset.filter(AnyOf(F("pk"), ArraySubquery(matches)))
+            .annotate(search_rank=SearchRank(F("search_vector"), query))
+            .order_by("-search_rank", "pk")
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": self.search_description,
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+class TaskSearchFilter(FullTextSearchFilter):
+    """Поиск задач по названию и описанию с учётом словоформ"""
+
+    search_config = TASK_SEARCH_CONFIG
+    search_description = 'Слова из названия и описания задачи: слова, "фраза", or, -исключение'
+
+
+class EmployeeSearchFilter(FullTextSearchFilter):
+    """Поиск сотрудников по фамилии, имени и должности по началу слов (для подсказок при наборе)"""
+
+    search_config = EMPLOYEE_SEARCH_CONFIG
+    search_description = "Начала слов из фамилии, имени и должности сотрудника"
+
+    def get_search_query(self, text):
+        words = SEARCH_WORD.findall(text)
+        if not words:
+            return None
+        return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config=self.search_config)
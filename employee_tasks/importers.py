@@ -0,0 +1,154 @@
+import csv
+import json
+import time
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from employee_tasks.events import publish_reset
+
+# Количество строк файла, которые сохраняются одним запросом в своей транзакции
+IMPORT_CHUNK_SIZE = 5000
+
+# Расширение файла -> формат
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def read_rows(file, file_format):
+    """Строки файла в виде словарей: CSV с заголовком или NDJSON (один JSON-объект на строку)"""
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise CommandError(f"Строка {line_number}: неверный JSON")
+        if not isinstance(row, dict):
+            raise CommandError(f"Строка {line_number}: ожидается JSON-объект")
+        yield row
+
+
+def chunked(rows, size):
+    """Разбивает поток строк на списки по size строк"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def copy_rows(table, columns, rows):
+    """Сохраняет кортежи значений в таблицу (модель или имя таблицы) одной командой COPY в своей транзакции.
+
+    Модели и INSERT не собираются, поэтому это самый быстрый способ загрузки в PostgreSQL. Значения полей
+    по умолчанию и auto_now не подставляются: все обязательные столбцы должны быть в columns.
+    """
+    buffer = StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    if not isinstance(table, str):
+        table = table._meta.db_table
+    table = connection.ops.quote_name(table)
+    columns = ", ".join(connection.ops.quote_name(column) for column in columns)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Загрузку можно повторить, поэтому не ждём записи WAL на диск при каждой фиксации порции
+        cursor.execute("SET LOCAL synchronous_commit TO OFF")
+        # copy_expert вызывается напрямую у курсора psycopg2, поэтому ошибки базы оборачиваем сами
+        with connection.wrap_database_errors:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+class ImportCommand(BaseCommand):
+    """Базовая команда для потоковой загрузки строк из файла CSV или NDJSON порциями.
+
+    Файл читается построчно, каждая порция сохраняется одним запросом в своей транзакции, поэтому память
+    не зависит от размера файла. Наследник реализует ``import_rows`` и возвращает количество загруженных строк.
+    """
+
+    imported_label = "Загружено строк"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу CSV (с заголовком) или NDJSON")
+        parser.add_argument(
+            "--format",
+            choices=sorted(set(IMPORT_FORMATS.values())),
+            help="Формат файла (по умолчанию определяется по расширению)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Количество строк, которые сохраняются одним запросом",
+        )
+
+    def handle(self, *args, **options):
+        self.path = Path(options["path"])
+        self.file_format = options["format"] or IMPORT_FORMATS.get(self.path.suffix.lower())
+        self.chunk_size = options["chunk_size"]
+        self.verbosity = options["verbosity"]
+
+        if not self.path.is_file():
+            raise CommandError(f"Файл {self.path} не найден")
+        if self.file_format is None:
+            raise CommandError("Не удалось определить формат файла, укажите --format")
+        if self.chunk_size < 1:
+            raise CommandError("--chunk-size должен быть больше нуля")
+
+        self.started = time.monotonic()
+        try:
+            count = self.import_rows(options)
+        finally:
+            # Загрузка пишет в базу в обход сигналов: клиентов событий оповещаем сами, в том числе после ошибки
+            # (порции до неё уже сохранены)
+            publish_reset()
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(f"{self.imported_label}: {count} за {elapsed:.1f} с ({self.rate(count)} строк/с)")
+        )
+
+    def import_rows(self, options):
+        raise NotImplementedError
+
+    def chunks(self):
+        """Порции строк файла вместе с номером первой строки порции (строки нумеруются с единицы)"""
+        with self.path.open(newline="", encoding="utf-8") as file:
+            start = 1
+            for chunk in chunked(read_rows(file, self.file_format), self.chunk_size):
+                yield start, chunk
+                start += len(chunk)
+
+    def save_chunk(self, model, start, objects):
+        """Сохраняет порцию одним bulk_create; при ошибке базы порция не сохраняется и загрузка прерывается"""
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objects)
+        except DatabaseError as error:
+            raise CommandError(f"Строки {start}-{start + len(objects) - 1} не загружены: {error}")
+
+    def copy_chunk(self, table, start, columns, rows):
+        """Сохраняет порцию кортежей значений в таблицу одной командой COPY (см. ``copy_rows``)"""
+        try:
+            copy_rows(table, columns, rows)
+        except DatabaseError as error:
+            raise CommandError(f"Строки {start}-{start + len(rows) - 1} не загружены: {error}")
+
+    def rate(self, count):
+        """Количество строк в секунду с начала загрузки"""
+        return round(count / max(time.monotonic() - self.started, 1e-6))
+
+    def progress(self, message):
+        if self.verbosity > 1:
+            self.stdout.write(message)
+
+    @staticmethod
+    def required(number, row, name):
+        value = row.get(name)
+        if value in (None, ""):
+            raise CommandError(f"Строка {number}: не заполнено поле {name}")
+        return value
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("employee_tasks.profiling")
+
+# Профиль текущего запроса; None, если запрос не попал в выборку профилирования
+current_profile = ContextVar("current_profile", default=None)
+
+# Сколько символов текста запроса SQL попадает в журнал
+SQL_LOG_LENGTH = 300
+
+
+class QueryRecorder:
+    """Считает запросы к базе во всех подключениях: количество, общее время и самые медленные запросы.
+
+    Подключается через ``connection.execute_wrapper``, поэтому работает без DEBUG и хранит только
+    slowest самых медленных запросов (все запросы - только с keep_statements, для тестов).
+    """
+
+    def __init__(self, slowest=0, keep_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_limit = slowest
+        self.slowest = []
+        self.statements = [] if keep_statements else None
+        # Порядковый номер запроса: различает запросы с одинаковым временем в куче самых медленных
+        self.sequence = itertools.count()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if self.statements is not None:
+                self.statements.append(sql)
+            if self.slowest_limit:
+                heapq.heappush(self.slowest, (duration, next(self.sequence), sql))
+                if len(self.slowest) > self.slowest_limit:
+                    heapq.heappop(self.slowest)
+
+    @contextmanager
+    def record(self):
+        """Считает запросы всех подключений к базе внутри блока"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def slowest_statements(self):
+        return [
+            {"sql": sql[:SQL_LOG_LENGTH], "ms": round(duration * 1000, 2)}
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+class RequestProfile:
+    """Профиль одного запроса к API: запросы к базе, время сериализации и действие представления"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = QueryRecorder(settings.REQUEST_PROFILING_SLOW_QUERIES)
+        self.serializer_duration = 0.0
+        self.view = None
+
+    @contextmanager
+    def serializing(self):
+        """Время сериализации без запросов к базе, которые выполнились во время неё (ленивые querysets)"""
+        db_duration = self.queries.duration
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started - (self.queries.duration - db_duration)
+            self.serializer_duration += elapsed
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing (время в миллисекундах)"""
+        return (
+            f'db;dur={self.queries.duration * 1000:.1f};desc="{self.queries.count} queries", '
+            f"serializer;dur={self.serializer_duration * 1000:.1f}, total;dur={total * 1000:.1f}"
+        )
+
+    def as_dict(self, request, response, total):
+        return {
+            "method": request.method,
+            "path": request.path,
+            "view": self.view,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "queries": self.queries.count,
+            "db_ms": round(self.queries.duration * 1000, 2),
+            "serializer_ms": round(self.serializer_duration * 1000, 2),
+            "slowest": self.queries.slowest_statements(),
+        }
+
+
+class RequestProfilingMiddleware:
+    """Профилирует долю REQUEST_PROFILING_SAMPLE_RATE запросов (по умолчанию 0 - выключено).
+
+    Для запроса из выборки в ответ добавляется заголовок Server-Timing (база, сериализация, всё время),
+    а в журнал employee_tasks.profiling - JSON-строка с количеством и временем запросов к базе, временем
+    сериализации и самыми медленными запросами SQL. Запросы вне выборки стоят одно сравнение.
+    Потоковые ответы профилируются до начала отдачи тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with profile.queries.record():
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+
+        total = time.perf_counter() - profile.started
+        response["Server-Timing"] = profile.server_timing(total)
+        logger.info(json.dumps(profile.as_dict(request, response, total), ensure_ascii=False))
+        return response
+
+
+class RequestProfilingMixin:
+    """Дополняет профиль запроса (RequestProfilingMiddleware) действием представления и временем сериализации"""
+
+    def initial(self, request, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.view = f"{type(self).__name__}.{self.action}"
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        profile = current_profile.get()
+        if profile is not None:
+            # serializer.data вызывает to_representation, вложенные сериализаторы входят в его время
+            to_representation = serializer.to_representation
+
+            def timed_to_representation(instance):
+                with profile.serializing():
+                    return to_representation(instance)
+
+            serializer.to_representation = timed_to_representation
+        return serializer
@@ -0,0 +1,192 @@
+import json
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from employee_tasks.benchmarks import BENCH_EMAIL, BENCH_TOLERANCE, find_regressions, measure, summarize
+from employee_tasks.cache import RESPONSE_CACHE_ALIAS
+from employee_tasks.models import Employee, Task
+
+# Кеши с выключенным кешем ответов: данные каждого запроса читаются из базы
+UNCACHED_RESPONSES = {
+    **settings.CACHES,
+    RESPONSE_CACHE_ALIAS: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+# Файл базовой линии по умолчанию
+BENCH_BASELINE = Path(settings.BASE_DIR) / "bench_baseline.json"
+
+# Количество задач в фильтре /employee/?task_id=
+TASK_ID_FILTER_SIZE = 5
+
+# Сценарии чтения измеряются без кеша ответов, чтобы измерялась работа самих запросов; сценарии *_cached -
+# попадания в кеш ответов тех же адресов
+CACHED_SUFFIX = "_cached"
+READ_SCENARIOS = (
+    "task_list",
+    "task_important",
+    "employee_busy",
+    "employee_task_id",
+    "task_important_cached",
+    "employee_busy_cached",
+)
+WRITE_SCENARIOS = ("task_create", "task_update", "task_delete")
+
+
+class Command(BaseCommand):
+    """Бенчмарк основных запросов к API со сравнением с базовой линией"""
+
+    help = (
+        "Выполняет запросы к /task/, /task/important/, /employee/busy/, /employee/?task_id= (без кеша ответов "
+        "и, в сценариях *_cached, из него) и изменение задач (создание, изменение, удаление) в процессе, "
+        "без HTTP-сервера, и выводит перцентили времени ответа, количество запросов к базе и строк в секунду. "
+        "С --save результаты сохраняются в базовую линию, без него сравниваются с ней: команда завершается "
+        "ошибкой, если метрики ухудшились. Данные для бенчмарка создаёт seed_bench"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30, help="Количество измеряемых запросов сценария")
+        parser.add_argument("--warmup", type=int, default=3, help="Количество запросов сценария до измерений")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=READ_SCENARIOS + WRITE_SCENARIOS,
+            help="Сценарий (можно указать несколько раз, по умолчанию все)",
+        )
+        parser.add_argument("--baseline", default=BENCH_BASELINE, help="Файл базовой линии JSON")
+        parser.add_argument("--save", action="store_true", help="Сохранить результаты как базовую линию")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=BENCH_TOLERANCE,
+            help="Допустимое ухудшение времени ответа и строк в секунду (доля)",
+        )
+        parser.add_argument(
+            "--email", default=BENCH_EMAIL.format(1), help="Почта сотрудника, от имени которого идут запросы"
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["warmup"] < 0:
+            raise CommandError("--iterations должен быть больше нуля, --warmup не может быть отрицательным")
+        self.employee = Employee.objects.filter(email=options["email"]).first()
+        if self.employee is None:
+            raise CommandError(f"Сотрудник {options['email']} не найден, создайте данные командой seed_bench")
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.employee)}")
+
+        scenarios = options["scenario"] or READ_SCENARIOS + WRITE_SCENARIOS
+        results = {
+            "dataset": {"employees": Employee.objects.count(), "tasks": Task.objects.count()},
+            "scenarios": self.run(scenarios, options["warmup"], options["iterations"]),
+        }
+        self.report(results["scenarios"])
+
+        path = Path(options["baseline"])
+        if options["save"]:
+            path.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Базовая линия сохранена в {path}"))
+            return
+        self.compare(results, path, options["tolerance"])
+
+    def run(self, scenarios, warmup, iterations):
+        """Метрики сценариев; чтения выполняются до изменений, чтобы изменения не меняли ключи кеша ответов"""
+        samples = {name: [] for name in scenarios}
+        reads = [name for name in READ_SCENARIOS if name in samples]
+        writes = [name for name in WRITE_SCENARIOS if name in samples]
+
+        for name in reads:
+            cached = name.endswith(CACHED_SUFFIX)
+            url = self.read_url(name.removesuffix(CACHED_SUFFIX))
+            with nullcontext() if cached else override_settings(CACHES=UNCACHED_RESPONSES):
+                if cached:
+                    # Первый запрос кладёт ответ в кеш, измеряются только попадания
+                    self.ensure_ok(self.client.get(url), url)
+                for iteration in range(warmup + iterations):
+                    response, sample = measure(lambda: self.client.get(url))
+                    self.ensure_ok(response, url)
+                    if iteration >= warmup:
+                        samples[name].append(sample)
+
+        if writes:
+            for iteration in range(warmup + iterations):
+                for name, sample in self.write_task():
+                    if iteration >= warmup and name in samples:
+                        samples[name].append(sample)
+
+        return {name: summarize(samples[name]) for name in scenarios}
+
+    def read_url(self, name):
+        if name == "task_list":
+            return reverse("employee_tasks:task-list")
+        if name == "task_important":
+            return reverse("employee_tasks:task-important")
+        if name == "employee_busy":
+            return reverse("employee_tasks:employee-busy")
+
+        # Рекомендации сотрудников для важных задач, а если их нет - для первых задач
+        task_ids = list(Task.objects.important().values_list("id", flat=True)[:TASK_ID_FILTER_SIZE])
+        task_ids = task_ids or list(Task.objects.order_by("id").values_list("id", flat=True)[:TASK_ID_FILTER_SIZE])
+        if not task_ids:
+            raise CommandError("Нет задач, создайте данные командой seed_bench")
+        return f"{reverse('employee_tasks:employee-list')}?task_id={','.join(map(str, task_ids))}"
+
+    def write_task(self):
+        """Создаёт, изменяет и удаляет задачу; возвращает пары (сценарий, Sample)"""
+        data = {
+            "title_task": "Задача бенчмарка",
+            "task_description": "Создана командой benchmark",
+            "employee": self.employee.pk,
+            "deadline": (timezone.now() + timedelta(days=1)).isoformat(),
+            "status": "pending",
+        }
+        url = reverse("employee_tasks:task-list")
+        response, created = measure(lambda: self.client.post(url, data, format="json"))
+        self.ensure_ok(response, url)
+
+        url = reverse("employee_tasks:task-detail", args=[response.data["id"]])
+        data["status"] = "in_progress"
+        response, updated = measure(lambda: self.client.put(url, data, format="json"))
+        self.ensure_ok(response, url)
+
+        response, deleted = measure(lambda: self.client.delete(url))
+        self.ensure_ok(response, url)
+        return [("task_create", created), ("task_update", updated), ("task_delete", deleted)]
+
+    @staticmethod
+    def ensure_ok(response, url):
+        if response.status_code >= 400:
+            raise CommandError(f"{response.request['REQUEST_METHOD']} {url}: ответ {response.status_code}")
+
+    def report(self, scenarios):
+        self.stdout.write(
+            f"{'сценарий':<22}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'запросов':>10}{'строк/с':>12}"
+        )
+        for name, metrics in scenarios.items():
+            self.stdout.write(
+                f"{name:<22}{metrics['p50_ms']:>10}{metrics['p95_ms']:>10}{metrics['p99_ms']:>10}"
+                f"{metrics['queries']:>10}{metrics['rows_per_second']:>12}"
+            )
+
+    def compare(self, results, path, tolerance):
+        if not path.is_file():
+            raise CommandError(f"Базовая линия {path} не найдена, сохраните её с --save")
+        baseline = json.loads(path.read_text())
+        if baseline.get("dataset") != results["dataset"]:
+            raise CommandError(
+                f"Базовая линия записана на других данных ({baseline.get('dataset')}, сейчас {results['dataset']}), "
+                "пересоздайте её с --save"
+            )
+
+        regressions = find_regressions(results["scenarios"], baseline["scenarios"], tolerance)
+        if regressions:
+            raise CommandError("Метрики ухудшились относительно базовой линии:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("Метрики не хуже базовой линии"))
@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from employee_tasks.benchmarks import BENCH_EMAIL
+from employee_tasks.compression import CODECS, CompressionMiddleware
+from employee_tasks.models import Employee
+
+# Уровни сжатия, которые сравниваются: быстрый, по умолчанию и сильный для каждой кодировки
+COMPRESSION_BENCH_LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 9), "zstd": (1, 3, 9)}
+
+SCENARIOS = ("task_list", "employee_busy", "task_export")
+SCENARIO_URLS = {
+    "task_list": "employee_tasks:task-list",
+    "employee_busy": "employee_tasks:employee-busy",
+    "task_export": "employee_tasks:task-export",
+}
+
+
+class Command(BaseCommand):
+    """Сравнение кодировок и уровней сжатия на типичных ответах API"""
+
+    help = (
+        "Получает ответы /task/, /employee/busy/ (страница --page-size) и выгрузку /task/export/ без сжатия, "
+        "сжимает их каждой кодировкой на нескольких уровнях и выводит размер, время сжатия и время передачи "
+        "по каналу --bandwidth Мбит/с. Данные для сравнения создаёт seed_bench"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100, help="Количество строк на странице списков")
+        parser.add_argument("--bandwidth", type=float, default=2.0, help="Скорость канала клиента, Мбит/с")
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Ответ (по умолчанию все)")
+        parser.add_argument(
+            "--email", default=BENCH_EMAIL.format(1), help="Почта сотрудника, от имени которого идут запросы"
+        )
+
+    def handle(self, *args, **options):
+        if options["page_size"] < 1 or options["bandwidth"] <= 0:
+            raise CommandError("--page-size и --bandwidth должны быть больше нуля")
+        employee = Employee.objects.filter(email=options["email"]).first()
+        if employee is None:
+            raise CommandError(f"Сотрудник {options['email']} не найден, создайте данные командой seed_bench")
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(employee)}")
+        self.bytes_per_ms = options["bandwidth"] * 1_000_000 / 8 / 1000
+
+        self.stdout.write(
+            f"{'ответ':<15}{'кодировка':<11}{'уровень':>8}{'размер, КБ':>12}{'сжатие, раз':>13}"
+            f"{'сжатие, мс':>12}{'передача, мс':>14}{'всего, мс':>11}"
+        )
+        for name in options["scenario"] or SCENARIOS:
+            chunks = self.fetch(name, options["page_size"])
+            self.report(name, "identity", "-", sum(map(len, chunks)), sum(map(len, chunks)), 0.0)
+            for encoding, levels in COMPRESSION_BENCH_LEVELS.items():
+                for level in levels:
+                    size, elapsed = self.compress(CODECS[encoding](level), chunks)
+                    self.report(name, encoding, level, sum(map(len, chunks)), size, elapsed)
+
+    def fetch(self, name, page_size):
+        """Тело ответа без сжатия: список частей потокового ответа или одна часть"""
+        url = reverse(SCENARIO_URLS[name])
+        if name != "task_export":
+            url += f"?page_size={page_size}"
+
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url}: ответ {response.status_code}")
+        return list(response.streaming_content) if response.streaming else [response.content]
+
+    @staticmethod
+    def compress(codec, chunks):
+        """Размер сжатого тела и время сжатия в мс; потоковый ответ сжимается по частям, как в middleware"""
+        started = time.perf_counter()
+        if len(chunks) == 1:
+            size = len(codec.compress(chunks[0]))
+        else:
+            size = sum(map(len, CompressionMiddleware.compress_stream(codec, chunks)))
+        return size, (time.perf_counter() - started) * 1000
+
+    def report(self, name, encoding, level, original, size, elapsed):
+        transfer = size / self.bytes_per_ms
+        self.stdout.write(
+            f"{name:<15}{encoding:<11}{level:>8}{size / 1024:>12.1f}{original / size:>13.1f}"
+            f"{elapsed:>12.1f}{transfer:>14.1f}{elapsed + transfer:>11.1f}"
+        )
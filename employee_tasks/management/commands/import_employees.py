@@ -0,0 +1,60 @@
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management.base import CommandError
+
+from employee_tasks.importers import ImportCommand
+from employee_tasks.models import Employee
+
+
+class Command(ImportCommand):
+    """Загружает сотрудников из файла CSV или NDJSON"""
+
+    help = (
+        "Загружает сотрудников из файла CSV или NDJSON с полями email, first_name, last_name, position и "
+        "необязательным password"
+    )
+    imported_label = "Загружено сотрудников"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--passwords",
+            choices=["hash", "hashed", "skip"],
+            default="hash",
+            help=(
+                "hash - захешировать пароли из файла (медленно: один PBKDF2 на сотрудника); "
+                "hashed - в файле уже хеши паролей Django, они сохраняются как есть; "
+                "skip - не задавать пароли, сотрудник сможет войти после смены пароля"
+            ),
+        )
+
+    def import_rows(self, options):
+        count = 0
+        for start, chunk in self.chunks():
+            employees = [
+                self.build_employee(number, row, options["passwords"]) for number, row in enumerate(chunk, start)
+            ]
+            self.save_chunk(Employee, start, employees)
+            count += len(employees)
+            self.progress(f"Загружено сотрудников: {count} ({self.rate(count)} строк/с)")
+        return count
+
+    def build_employee(self, number, row, passwords):
+        employee = Employee(
+            email=Employee.objects.normalize_email(self.required(number, row, "email")),
+            first_name=self.required(number, row, "first_name"),
+            last_name=self.required(number, row, "last_name"),
+            position=self.required(number, row, "position"),
+        )
+
+        password = row.get("password") or None
+        if password is None or passwords == "skip":
+            employee.set_unusable_password()
+        elif passwords == "hashed":
+            try:
+                identify_hasher(password)
+            except ValueError:
+                raise CommandError(f"Строка {number}: пароль не является хешем Django")
+            employee.password = password
+        else:
+            employee.set_password(password)
+        return employee
@@ -0,0 +1,119 @@
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from employee_tasks.importers import ImportCommand
+from employee_tasks.models import Employee, Task
+
+# Столбцы таблицы задач, которые заполняет загрузка
+TASK_COLUMNS = (
+    "external_id",
+    "title_task",
+    "task_description",
+    "employee_id",
+    "deadline",
+    "status",
+    "created_at",
+    "updated_at",
+)
+
+# Временная таблица со ссылками на родительские задачи по external_id
+LINKS_TABLE = "import_task_links"
+
+
+class Command(ImportCommand):
+    """Загружает задачи из файла CSV или NDJSON"""
+
+    help = (
+        "Загружает задачи из файла CSV или NDJSON с полями external_id, title_task, task_description, "
+        "employee (почта сотрудника), parent_task (external_id родительской задачи), deadline и status. "
+        "Задачи сохраняются командой COPY, родительские задачи связываются в конце загрузки одним запросом, "
+        "поэтому порядок строк не важен"
+    )
+    imported_label = "Загружено задач"
+
+    def import_rows(self, options):
+        self.employee_ids = {}
+        self.statuses = {status for status, _ in Task.STATUS_CHOICES}
+
+        with connection.cursor() as cursor:
+            # Ссылки на родительские задачи копятся во временной таблице и связываются одним UPDATE в конце
+            cursor.execute(f"CREATE TEMPORARY TABLE {LINKS_TABLE} (external_id text, parent_external_id text)")
+        try:
+            count = 0
+            for start, chunk in self.chunks():
+                self.load_employee_ids(chunk)
+                now = timezone.now()
+                tasks = [self.build_task(number, row, now) for number, row in enumerate(chunk, start)]
+                self.copy_chunk(Task, start, TASK_COLUMNS, tasks)
+                links = [
+                    (task[0], str(row["parent_task"])) for task, row in zip(tasks, chunk) if row.get("parent_task")
+                ]
+                if links:
+                    self.copy_chunk(LINKS_TABLE, start, ("external_id", "parent_external_id"), links)
+                count += len(tasks)
+                self.progress(f"Загружено задач: {count} ({self.rate(count)} строк/с)")
+
+            linked, missing = self.link_parents()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {LINKS_TABLE}")
+
+        self.stdout.write(f"Связано с родительскими задачами: {linked}")
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Не найдены родительские задачи: {missing}"))
+        return count
+
+    def load_employee_ids(self, chunk):
+        """Дозагружает id сотрудников порции по почте одним запросом"""
+        emails = {Employee.objects.normalize_email(row["employee"]) for row in chunk if row.get("employee")}
+        emails -= self.employee_ids.keys()
+        if emails:
+            self.employee_ids.update(Employee.objects.filter(email__in=emails).values_list("email", "id"))
+
+    def build_task(self, number, row, now):
+        """Значения столбцов TASK_COLUMNS для строки файла"""
+        employee_id = None
+        if row.get("employee"):
+            employee_id = self.employee_ids.get(Employee.objects.normalize_email(row["employee"]))
+            if employee_id is None:
+                raise CommandError(f"Строка {number}: сотрудник {row['employee']} не найден")
+
+        external_id = str(row["external_id"]) if row.get("external_id") else None
+        if row.get("parent_task") and (external_id is None or str(row["parent_task"]) == external_id):
+            raise CommandError(f"Строка {number}: для родительской задачи нужен собственный external_id задачи")
+
+        deadline = None
+        if row.get("deadline"):
+            deadline = parse_datetime(row["deadline"])
+            if deadline is None:
+                raise CommandError(f"Строка {number}: неверный срок выполнения {row['deadline']}")
+            if timezone.is_naive(deadline):
+                deadline = timezone.make_aware(deadline)
+
+        status = row.get("status") or "pending"
+        if status not in self.statuses:
+            raise CommandError(f"Строка {number}: неизвестный статус {status}")
+
+        title_task = self.required(number, row, "title_task")
+        task_description = self.required(number, row, "task_description")
+        return external_id, title_task, task_description, employee_id, deadline, status, now, now
+
+    def link_parents(self):
+        """Второй проход: проставляет parent_task всем загруженным задачам одним UPDATE по external_id.
+
+        Возвращает количество связанных задач и количество ссылок на родительские задачи, которых нет в базе.
+        """
+        table = connection.ops.quote_name(Task._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS task SET parent_task_id = parent.id "
+                f"FROM {LINKS_TABLE} AS link "
+                f"JOIN {table} AS parent ON parent.external_id = link.parent_external_id "
+                f"WHERE task.external_id = link.external_id"
+            )
+            linked = cursor.rowcount
+            cursor.execute(f"SELECT COUNT(*) FROM {LINKS_TABLE}")
+            total = cursor.fetchone()[0]
+        return linked, total - linked
@@ -0,0 +1,105 @@
+import base64
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employee_tasks.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    """Нагрузочный тест: параллельные GET-запросы к запущенному серверу"""
+
+    help = (
+        "Отправляет --requests GET-запросов к адресу в --concurrency потоков (у каждого потока своё "
+        "keep-alive соединение) и выводит количество запросов в секунду и время ответа. Сравнение режимов "
+        "запуска: одна и та же команда против APP_SERVER=runserver и APP_SERVER=wsgi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Адрес, например http://127.0.0.1:8000/employee/")
+        parser.add_argument("--requests", type=int, default=1000, help="Общее количество запросов")
+        parser.add_argument("--concurrency", type=int, default=10, help="Количество параллельных клиентов")
+        parser.add_argument("--email", help="Почта сотрудника для Basic-аутентификации")
+        parser.add_argument("--password", help="Пароль сотрудника для Basic-аутентификации")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise CommandError("Укажите адрес вида http://host:port/path/")
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests и --concurrency должны быть больше нуля")
+
+        self.url = url
+        self.path = url.path or "/"
+        if url.query:
+            self.path += f"?{url.query}"
+        self.headers = {"Accept": "application/json"}
+        if options["email"]:
+            credentials = f"{options['email']}:{options['password'] or ''}".encode()
+            self.headers["Authorization"] = f"Basic {base64.b64encode(credentials).decode()}"
+
+        self.remaining = options["requests"]
+        self.lock = threading.Lock()
+        self.latencies, self.errors = [], {}
+
+        started = time.monotonic()
+        clients = [threading.Thread(target=self.client) for _ in range(min(options["concurrency"], self.remaining))]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.monotonic() - started
+
+        self.report(elapsed)
+
+    def take(self):
+        """Забирает следующий запрос из общего количества; False, если запросы закончились"""
+        with self.lock:
+            if self.remaining == 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def client(self):
+        """Поток-клиент: отправляет запросы по одному соединению, пока они не закончатся"""
+        connection_class = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(self.url.hostname, self.url.port, timeout=30)
+        latencies, errors = [], {}
+        try:
+            while self.take():
+                started = time.monotonic()
+                try:
+                    connection.request("GET", self.path, headers=self.headers)
+                    response = connection.getresponse()
+                    response.read()
+                    error = None if response.status == 200 else str(response.status)
+                except (OSError, http.client.HTTPException) as exception:
+                    connection.close()
+                    error = type(exception).__name__
+                if error is None:
+                    latencies.append(time.monotonic() - started)
+                else:
+                    errors[error] = errors.get(error, 0) + 1
+        finally:
+            connection.close()
+
+        with self.lock:
+            self.latencies += latencies
+            for error, count in errors.items():
+                self.errors[error] = self.errors.get(error, 0) + count
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        self.stdout.write(f"Успешных запросов: {len(latencies)} за {elapsed:.2f} с")
+        if self.errors:
+            errors = ", ".join(f"{error}: {count}" for error, count in sorted(self.errors.items()))
+            self.stdout.write(self.style.WARNING(f"Ошибки: {errors}"))
+        if not latencies:
+            raise CommandError("Ни один запрос не выполнен успешно")
+
+        self.stdout.write(self.style.SUCCESS(f"Запросов в секунду: {len(latencies) / elapsed:.1f}"))
+        percentiles = ", ".join(f"p{rank}={percentile(latencies, rank) * 1000:.1f}" for rank in (50, 95, 99))
+        self.stdout.write(f"Время ответа, мс: {percentiles}")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from employee_tasks.models import TASK_COUNTER_FIELDS, Employee, Task
+
+
+class Command(BaseCommand):
+    """Пересчитывает счётчики задач сотрудников по таблице задач"""
+
+    help = "Пересчитывает счётчики задач сотрудников и исправляет расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать количество сотрудников с неверными счётчиками",
+        )
+
+    def handle(self, *args, **options):
+        employee_table = connection.ops.quote_name(Employee._meta.db_table)
+        task_table = connection.ops.quote_name(Task._meta.db_table)
+        fields = TASK_COUNTER_FIELDS.values()
+
+        counts = ", ".join(f"COUNT(t.id) FILTER (WHERE t.status = %s) AS {field}" for field in fields)
+        actual_counts = (
+            f"SELECT e.id, {counts} FROM {employee_table} AS e "
+            f"LEFT JOIN {task_table} AS t ON t.employee_id = e.id GROUP BY e.id"
+        )
+        drift = "({}) IS DISTINCT FROM ({})".format(
+            ", ".join(f"e.{field}" for field in fields), ", ".join(f"c.{field}" for field in fields)
+        )
+
+        if options["dry_run"]:
+            sql = f"SELECT COUNT(*) FROM {employee_table} AS e JOIN ({actual_counts}) AS c ON c.id = e.id"
+            sql += f" WHERE {drift}"
+        else:
+            assignments = ", ".join(f"{field} = c.{field}" for field in fields)
+            sql = f"UPDATE {employee_table} AS e SET {assignments} FROM ({actual_counts}) AS c"
+            sql += f" WHERE c.id = e.id AND {drift}"
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Блокируем запись задач, чтобы триггеры не меняли счётчики во время пересчёта
+            cursor.execute(f"LOCK TABLE {task_table} IN SHARE MODE")
+            cursor.execute(sql, list(TASK_COUNTER_FIELDS))
+            employees_count = cursor.fetchone()[0] if options["dry_run"] else cursor.rowcount
+
+        if options["dry_run"]:
+            self.stdout.write(f"Сотрудников с неверными счётчиками: {employees_count}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Исправлены счётчики у сотрудников: {employees_count}"))
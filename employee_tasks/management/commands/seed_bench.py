@@ -0,0 +1,262 @@
+import random
+import time
+from collections import deque
+from datetime import timedelta
+from io import StringIO
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from employee_tasks.benchmarks import BENCH_EMAIL, BENCH_EMAIL_PREFIX
+from employee_tasks.events import publish_reset
+from employee_tasks.importers import IMPORT_CHUNK_SIZE, chunked, copy_rows
+from employee_tasks.models import Employee, Task, TaskTombstone
+
+# Доли задач по статусам: большая часть задач в истории уже завершена
+BENCH_STATUS_WEIGHTS = {"completed": 50, "pending": 25, "in_progress": 15, "canceled": 10}
+BENCH_STATUSES = list(BENCH_STATUS_WEIGHTS)
+BENCH_STATUS_CUM_WEIGHTS = list(accumulate(BENCH_STATUS_WEIGHTS.values()))
+
+# Доли задач без сотрудника, без срока, подзадач первого уровня и начал глубоких цепочек подзадач
+UNASSIGNED_RATIO = 0.05
+NO_DEADLINE_RATIO = 0.2
+SUBTASK_RATIO = 0.3
+DEEP_CHAIN_RATIO = 0.002
+
+# Подзадача первого уровня привязывается к одной из последних созданных задач верхнего уровня
+RECENT_ROOTS = 1000
+
+# Задачи созданы за последний год, сроки - в пределах двух месяцев от текущего момента
+CREATED_WITHIN = timedelta(days=365)
+DEADLINE_WITHIN = timedelta(days=60)
+
+# Столбцы таблицы задач, которые заполняет генератор (id задаются явно, чтобы связать подзадачи)
+TASK_COLUMNS = (
+    "id",
+    "title_task",
+    "task_description",
+    "employee_id",
+    "parent_task_id",
+    "deadline",
+    "status",
+    "created_at",
+    "updated_at",
+)
+
+# Словари для имён сотрудников и текстов задач
+FIRST_NAMES = (
+    "Александр, Алексей, Анна, Борис, Валерия, Виктор, Дарья, Екатерина, Иван, Ирина, Кирилл, Мария, Михаил, "
+    "Наталья, Николай, Ольга, Павел, Светлана, Сергей, Татьяна"
+).split(", ")
+LAST_NAMES = (
+    "Белов, Волков, Воробьёв, Гусев, Егоров, Зайцев, Иванов, Козлов, Кузнецов, Лебедев, Морозов, Новиков, Орлов, "
+    "Павлов, Петров, Попов, Семёнов, Смирнов, Соколов, Фёдоров"
+).split(", ")
+POSITIONS = (
+    "Аналитик, Бухгалтер, Дизайнер, Инженер, Менеджер проектов, Маркетолог, Разработчик, Руководитель отдела, "
+    "Специалист поддержки, Тестировщик, Юрист"
+).split(", ")
+TASK_ACTIONS = (
+    "Подготовить, Проверить, Согласовать, Обновить, Исправить, Настроить, Описать, Провести, Собрать, Отправить, "
+    "Перенести, Оптимизировать"
+).split(", ")
+TASK_SUBJECTS = (
+    "отчёт, договор, презентацию, сервер, релиз, документацию, бюджет, план, интеграцию, макет, тесты, "
+    "базу данных, счёт, требования"
+).split(", ")
+TASK_TOPICS = (
+    "по продажам, для клиента, по проекту, для отдела кадров, за квартал, по закупкам, для партнёров, "
+    "по безопасности, по поддержке, для руководства"
+).split(", ")
+DESCRIPTION_WORDS = (
+    " ".join(TASK_ACTIONS + TASK_SUBJECTS + TASK_TOPICS).lower().split()
+    + "срочно после согласования с командой учесть замечания и сроки в рамках".split()
+)
+
+
+class Command(BaseCommand):
+    """Создаёт синтетические данные для нагрузочных тестов и бенчмарков"""
+
+    help = (
+        "Создаёт --employees сотрудников (почта bench-<номер>@example.com, пароль --password) и --tasks задач "
+        "с реалистичным распределением статусов, сроков и загруженности сотрудников, подзадачами и цепочками "
+        "подзадач глубиной --depth. Сотрудники сохраняются bulk_create, задачи - порциями командой COPY. "
+        "С одинаковым --seed на пустой базе создаются одинаковые данные"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=1000, help="Количество сотрудников")
+        parser.add_argument("--tasks", type=int, default=100000, help="Количество задач")
+        parser.add_argument("--depth", type=int, default=20, help="Глубина цепочек подзадач")
+        parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора случайных чисел")
+        parser.add_argument("--password", default="bench", help="Пароль сотрудников")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Количество строк, которые сохраняются одним запросом",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Перед созданием удалить ВСЕ задачи и записи об удалённых задачах, а также сотрудников bench-*",
+        )
+
+    def handle(self, *args, **options):
+        if options["employees"] < 0 or options["tasks"] < 0:
+            raise CommandError("--employees и --tasks не могут быть отрицательными")
+        if not 1 <= options["depth"] <= settings.TASK_MAX_DEPTH:
+            raise CommandError(f"--depth должна быть от 1 до {settings.TASK_MAX_DEPTH} (TASK_MAX_DEPTH)")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size должен быть больше нуля")
+
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.verbosity = options["verbosity"]
+        self.now = timezone.now()
+
+        self.started = time.monotonic()
+        try:
+            if options["clear"]:
+                self.clear()
+            employees = self.create_employees(options["employees"], options["password"])
+            tasks = self.create_tasks(options["tasks"], options["depth"])
+            with connection.cursor() as cursor:
+                # Статистика планировщика для новых данных, иначе первые запросы бенчмарка выбирают плохие планы
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(Employee._meta.db_table)}")
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(Task._meta.db_table)}")
+        finally:
+            # Задачи пишутся в обход сигналов: клиентов событий оповещаем сами
+            publish_reset()
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано сотрудников: {employees}, задач: {tasks} за {elapsed:.1f} с "
+                f"({self.rate(employees + tasks)} строк/с)"
+            )
+        )
+
+    def clear(self):
+        """Удаляет все задачи и сотрудников синтетических данных"""
+        tables = ", ".join(connection.ops.quote_name(model._meta.db_table) for model in (Task, TaskTombstone))
+        with transaction.atomic(), connection.cursor() as cursor:
+            # TRUNCATE невозможен, пока во внешней транзакции есть отложенные проверки внешних ключей
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"TRUNCATE {tables}")
+        Employee.objects.filter(email__startswith=BENCH_EMAIL_PREFIX).delete()
+        # TRUNCATE не вызывает триггеры, поэтому счётчики оставшихся сотрудников пересчитываются
+        call_command("reconcile_task_counters", stdout=StringIO())
+
+    def create_employees(self, count, password):
+        # Один хеш на всех: PBKDF2 для каждого сотрудника занял бы больше времени, чем вся загрузка
+        password = make_password(password)
+        start = Employee.objects.filter(email__startswith=BENCH_EMAIL_PREFIX).count() + 1
+        employees = (
+            Employee(
+                email=BENCH_EMAIL.format(number),
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                position=self.rng.choice(POSITIONS),
+                password=password,
+            )
+            for number in range(start, start + count)
+        )
+        created = 0
+        for chunk in chunked(employees, self.chunk_size):
+            try:
+                with transaction.atomic():
+                    Employee.objects.bulk_create(chunk)
+            except IntegrityError as error:
+                raise CommandError(f"Сотрудники не созданы: {error}. Запустите команду с --clear")
+            created += len(chunk)
+            self.progress("Создано сотрудников", created)
+        return created
+
+    def create_tasks(self, count, depth):
+        if not count:
+            return 0
+        employee_ids = list(
+            Employee.objects.filter(email__startswith=BENCH_EMAIL_PREFIX).order_by("id").values_list("id", flat=True)
+        )
+        if not employee_ids:
+            raise CommandError("Нет сотрудников bench-*, задайте --employees")
+
+        # Загруженность неравномерная: вес сотрудника обратно пропорционален корню из его места в списке
+        self.rng.shuffle(employee_ids)
+        self.employee_ids = employee_ids
+        self.employee_weights = list(accumulate(1 / (place + 1) ** 0.5 for place in range(len(employee_ids))))
+
+        first_id = (Task.objects.aggregate(last_id=Max("id"))["last_id"] or 0) + 1
+        created = 0
+        for chunk in chunked(self.build_tasks(first_id, count, depth), self.chunk_size):
+            try:
+                copy_rows(Task, TASK_COLUMNS, chunk)
+            except DatabaseError as error:
+                raise CommandError(f"Задачи не созданы: {error}")
+            created += len(chunk)
+            self.progress("Создано задач", created)
+
+        with connection.cursor() as cursor:
+            # id задавались явно, последовательность продолжается после них
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Task]):
+                cursor.execute(sql)
+        return created
+
+    def build_tasks(self, first_id, count, depth):
+        """Значения столбцов TASK_COLUMNS: задачи верхнего уровня, их подзадачи и цепочки глубиной depth.
+
+        Родительская задача всегда создаётся раньше подзадачи, поэтому ссылки проверяются в той же или
+        предыдущей порции.
+        """
+        recent_roots = deque(maxlen=RECENT_ROOTS)
+        task_id, end = first_id, first_id + count
+        while task_id < end:
+            if self.rng.random() < DEEP_CHAIN_RATIO:
+                # Цепочка: каждая задача - подзадача предыдущей, у последней depth родительских задач
+                parent_id = None
+                for _ in range(min(depth + 1, end - task_id)):
+                    yield self.build_task(task_id, parent_id)
+                    parent_id, task_id = task_id, task_id + 1
+                continue
+
+            parent_id = None
+            if recent_roots and self.rng.random() < SUBTASK_RATIO:
+                parent_id = self.rng.choice(recent_roots)
+            else:
+                recent_roots.append(task_id)
+            yield self.build_task(task_id, parent_id)
+            task_id += 1
+
+    def build_task(self, task_id, parent_id):
+        rng = self.rng
+        title_task = f"{rng.choice(TASK_ACTIONS)} {rng.choice(TASK_SUBJECTS)} {rng.choice(TASK_TOPICS)}"
+        task_description = " ".join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(5, 30))).capitalize()
+
+        employee_id = None
+        if rng.random() >= UNASSIGNED_RATIO:
+            employee_id = rng.choices(self.employee_ids, cum_weights=self.employee_weights)[0]
+
+        deadline = None
+        if rng.random() >= NO_DEADLINE_RATIO:
+            deadline = self.now + rng.uniform(-1, 1) * DEADLINE_WITHIN
+
+        status = rng.choices(BENCH_STATUSES, cum_weights=BENCH_STATUS_CUM_WEIGHTS)[0]
+        created_at = self.now - rng.random() * CREATED_WITHIN
+        updated_at = created_at + rng.random() * (self.now - created_at)
+        return task_id, title_task, task_description, employee_id, parent_id, deadline, status, created_at, updated_at
+
+    def rate(self, count):
+        """Количество строк в секунду с начала создания данных"""
+        return round(count / max(time.monotonic() - self.started, 1e-6))
+
+    def progress(self, label, count):
+        if self.verbosity > 1:
+            self.stdout.write(f"{label}: {count} ({self.rate(count)} строк/с)")
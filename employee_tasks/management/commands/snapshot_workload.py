@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from employee_tasks.models import WorkloadSnapshot
+
+
+class Command(BaseCommand):
+    """Сохраняет снимок загруженности сотрудников за текущий день"""
+
+    help = (
+        "Сохраняет снимок загруженности всех сотрудников (количество задач по статусам и просроченных задач) "
+        "за текущий день одним запросом. Повторный запуск в тот же день обновляет снимок. Запускается "
+        "периодически, например ежедневно из cron"
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        date = timezone.localdate(now)
+        with transaction.atomic():
+            count = WorkloadSnapshot.objects.take(date, now)
+        self.stdout.write(self.style.SUCCESS(f"Снимок загруженности за {date}: сотрудников {count}"))
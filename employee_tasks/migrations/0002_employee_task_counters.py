@@ -0,0 +1,141 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+COUNTERS_DELTA_SQL = """
+        UPDATE employee_tasks_employee AS e
+        SET pending_tasks_count = e.pending_tasks_count + d.pending,
+            active_tasks_count = e.active_tasks_count + d.in_progress,
+            completed_tasks_count = e.completed_tasks_count + d.completed,
+            canceled_tasks_count = e.canceled_tasks_count + d.canceled
+        FROM (
+            SELECT employee_id,
+                   SUM(CASE WHEN status = 'pending' THEN delta ELSE 0 END) AS pending,
+                   SUM(CASE WHEN status = 'in_progress' THEN delta ELSE 0 END) AS in_progress,
+                   SUM(CASE WHEN status = 'completed' THEN delta ELSE 0 END) AS completed,
+                   SUM(CASE WHEN status = 'canceled' THEN delta ELSE 0 END) AS canceled
+            FROM ({changes}) AS changes
+            WHERE employee_id IS NOT NULL
+            GROUP BY employee_id
+        ) AS d
+        WHERE e.id = d.employee_id
+          AND (d.pending, d.in_progress, d.completed, d.canceled) <> (0, 0, 0, 0);
+"""
+
+INSERTED = "SELECT employee_id, status, 1 AS delta FROM new_tasks"
+DELETED = "SELECT employee_id, status, -1 AS delta FROM old_tasks"
+
+# Триггеры уровня оператора с таблицами переходов: один UPDATE счётчиков на весь
+# оператор (в том числе bulk_create/bulk_update/QuerySet.update), а не на каждую строку.
+CREATE_TRIGGERS_SQL = f"""
+CREATE FUNCTION employee_tasks_task_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {COUNTERS_DELTA_SQL.format(changes=INSERTED)}
+    ELSIF TG_OP = 'UPDATE' THEN
+        {COUNTERS_DELTA_SQL.format(changes=f"{INSERTED} UNION ALL {DELETED}")}
+    ELSE
+        {COUNTERS_DELTA_SQL.format(changes=DELETED)}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER employee_tasks_task_counters_insert
+    AFTER INSERT ON employee_tasks_task
+    REFERENCING NEW TABLE AS new_tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION employee_tasks_task_counters();
+
+CREATE TRIGGER employee_tasks_task_counters_update
+    AFTER UPDATE ON employee_tasks_task
+    REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION employee_tasks_task_counters();
+
+CREATE TRIGGER employee_tasks_task_counters_delete
+    AFTER DELETE ON employee_tasks_task
+    REFERENCING OLD TABLE AS old_tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION employee_tasks_task_counters();
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS employee_tasks_task_counters_insert ON employee_tasks_task;
+DROP TRIGGER IF EXISTS employee_tasks_task_counters_update ON employee_tasks_task;
+DROP TRIGGER IF EXISTS employee_tasks_task_counters_delete ON employee_tasks_task;
+DROP FUNCTION IF EXISTS employee_tasks_task_counters();
+"""
+
+FILL_COUNTERS_SQL = """
+UPDATE employee_tasks_employee AS e
+SET pending_tasks_count = c.pending,
+    active_tasks_count = c.in_progress,
+    completed_tasks_count = c.completed,
+    canceled_tasks_count = c.canceled
+FROM (
+    SELECT employee_id,
+           COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+           COUNT(*) FILTER (WHERE status = 'in_progress') AS in_progress,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+           COUNT(*) FILTER (WHERE status = 'canceled') AS canceled
+    FROM employee_tasks_task
+    WHERE employee_id IS NOT NULL
+    GROUP BY employee_id
+) AS c
+WHERE e.id = c.employee_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("employee_tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="active_tasks_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество задач сотрудника в процессе выполнения",
+                verbose_name="Задач в работе",
+            ),
+        ),
+        migrations.AddField(
+            model_name="employee",
+            name="canceled_tasks_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество отменённых задач сотрудника",
+                verbose_name="Отменённых задач",
+            ),
+        ),
+        migrations.AddField(
+            model_name="employee",
+            name="completed_tasks_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество выполненных задач сотрудника",
+                verbose_name="Выполненных задач",
+            ),
+        ),
+        migrations.AddField(
+            model_name="employee",
+            name="pending_tasks_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество задач сотрудника в ожидании",
+                verbose_name="Задач в ожидании",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["-active_tasks_count", "id"], name="employee_busy_idx"),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL),
+        migrations.RunSQL(FILL_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
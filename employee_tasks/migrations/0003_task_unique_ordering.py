@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee_tasks", "0002_employee_task_counters"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="task",
+            options={
+                "ordering": ["employee_id", "title_task", "id"],
+                "verbose_name": "Задача",
+                "verbose_name_plural": "Задачи",
+            },
+        ),
+    ]
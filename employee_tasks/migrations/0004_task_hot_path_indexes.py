@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:01
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индексы строятся без блокировки записи в таблицу задач
+    atomic = False
+
+    dependencies = [
+        ("employee_tasks", "0003_task_unique_ordering"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(fields=["employee", "title_task", "id"], name="task_ordering_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status", "in_progress")), fields=["employee"], name="task_in_progress_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("parent_task__isnull", False), ("status", "pending")),
+                fields=["parent_task"],
+                name="task_pending_subtask_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee_tasks", "0004_task_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="external_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Ключ задачи во внешней системе, по нему связываются задачи при импорте",
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name="Внешний ключ",
+            ),
+        ),
+    ]
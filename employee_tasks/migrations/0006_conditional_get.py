@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:40
+
+import django.utils.timezone
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индекс строится без блокировки записи в таблицу задач
+    atomic = False
+
+    dependencies = [
+        ("employee_tasks", "0005_task_external_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                help_text="Дата обновления сотрудника",
+                verbose_name="Дата обновления",
+            ),
+            preserve_default=False,
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+        ),
+    ]
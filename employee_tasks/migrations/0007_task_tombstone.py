@@ -0,0 +1,31 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee_tasks", "0006_conditional_get"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskTombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("task_id", models.BigIntegerField(help_text="ID удалённой задачи", verbose_name="ID задачи")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        auto_now_add=True, help_text="Дата удаления задачи", verbose_name="Дата удаления"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удалённая задача",
+                "verbose_name_plural": "Удалённые задачи",
+                "indexes": [models.Index(fields=["deleted_at", "id"], name="tombstone_sync_idx")],
+            },
+        ),
+    ]
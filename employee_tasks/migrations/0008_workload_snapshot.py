@@ -0,0 +1,75 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee_tasks", "0007_task_tombstone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkloadSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(help_text="Дата снимка", verbose_name="Дата")),
+                (
+                    "pending_tasks_count",
+                    models.PositiveIntegerField(
+                        help_text="Количество задач сотрудника в ожидании", verbose_name="Задач в ожидании"
+                    ),
+                ),
+                (
+                    "active_tasks_count",
+                    models.PositiveIntegerField(
+                        help_text="Количество задач сотрудника в процессе выполнения", verbose_name="Задач в работе"
+                    ),
+                ),
+                (
+                    "completed_tasks_count",
+                    models.PositiveIntegerField(
+                        help_text="Количество выполненных задач сотрудника", verbose_name="Выполненных задач"
+                    ),
+                ),
+                (
+                    "canceled_tasks_count",
+                    models.PositiveIntegerField(
+                        help_text="Количество отменённых задач сотрудника", verbose_name="Отменённых задач"
+                    ),
+                ),
+                (
+                    "overdue_tasks_count",
+                    models.PositiveIntegerField(
+                        help_text="Количество незавершённых задач сотрудника с прошедшим сроком",
+                        verbose_name="Просроченных задач",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(help_text="Время, на которое посчитан снимок", verbose_name="Дата создания"),
+                ),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        help_text="Сотрудник, загруженность которого сохранена",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workload_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Сотрудник",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Снимок загруженности",
+                "verbose_name_plural": "Снимки загруженности",
+                "ordering": ["employee_id", "date"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("employee", "date"), name="workload_snapshot_employee_date_uniq")
+                ],
+            },
+        ),
+    ]
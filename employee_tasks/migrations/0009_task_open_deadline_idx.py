@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:44
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индекс строится без блокировки записи в таблицу задач
+    atomic = False
+
+    dependencies = [
+        ("employee_tasks", "0008_workload_snapshot"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deadline__isnull", False), ("status__in", ("pending", "in_progress"))),
+                fields=["deadline", "id"],
+                name="task_open_deadline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deadline__isnull", False), ("status__in", ("pending", "in_progress"))),
+                fields=["employee", "deadline"],
+                name="task_overdue_employee_idx",
+            ),
+        ),
+    ]
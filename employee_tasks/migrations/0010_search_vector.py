@@ -0,0 +1,57 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индексы строятся без блокировки записи в таблицы; добавление вычисляемых столбцов переписывает таблицы
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("employee_tasks", "0009_task_open_deadline_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector(
+                    "last_name", "first_name", "position", config="simple"
+                ),
+                help_text="Слова фамилии, имени и должности для полнотекстового поиска",
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector("title_task", config="russian", weight="A"),
+                    "||",
+                    django.contrib.postgres.search.SearchVector("task_description", config="russian", weight="B"),
+                    django.contrib.postgres.search.SearchConfig("russian"),
+                ),
+                help_text="Слова названия и описания задачи для полнотекстового поиска",
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="employee_search_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="task_search_idx"),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+# Триггеры уровня оператора BEFORE: строка версии блокируется до строк задач и сотрудников, поэтому все
+# изменяющие транзакции берут блокировки в одном порядке. Значения последовательности не возвращаются при
+# откате транзакции, поэтому версия после отката не совпадёт с версией других данных.
+CREATE_TRIGGERS_SQL = """
+CREATE SEQUENCE employee_tasks_data_version;
+
+INSERT INTO employee_tasks_dataversion (id, version) VALUES (1, nextval('employee_tasks_data_version'));
+
+CREATE FUNCTION employee_tasks_bump_data_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO employee_tasks_dataversion (id, version) VALUES (1, nextval('employee_tasks_data_version'))
+    ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER employee_tasks_task_data_version
+    BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON employee_tasks_task
+    FOR EACH STATEMENT EXECUTE FUNCTION employee_tasks_bump_data_version();
+
+CREATE TRIGGER employee_tasks_employee_data_version
+    BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON employee_tasks_employee
+    FOR EACH STATEMENT EXECUTE FUNCTION employee_tasks_bump_data_version();
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS employee_tasks_task_data_version ON employee_tasks_task;
+DROP TRIGGER IF EXISTS employee_tasks_employee_data_version ON employee_tasks_employee;
+DROP FUNCTION IF EXISTS employee_tasks_bump_data_version();
+DROP SEQUENCE IF EXISTS employee_tasks_data_version;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee_tasks", "0010_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "version",
+                    models.BigIntegerField(
+                        help_text="Номер последнего изменения задач или сотрудников", verbose_name="Версия"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Версия данных",
+                "verbose_name_plural": "Версии данных",
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL),
+    ]
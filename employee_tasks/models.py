@@ -1,10 +1,31 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
-from django.db import models
-from django.db.models import Count, Q
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models
+from django.db.models import Func, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Now
 
 NULLABLE = {"blank": True, "null": True}
 
+# Статус задачи -> поле сотрудника со счётчиком задач в этом статусе.
+# Счётчики поддерживаются триггерами на таблице задач (см. миграцию 0002).
+TASK_COUNTER_FIELDS = {
+    "pending": "pending_tasks_count",
+    "in_progress": "active_tasks_count",
+    "completed": "completed_tasks_count",
+    "canceled": "canceled_tasks_count",
+}
+
+# Статусы незавершённых задач: задача в этих статусах с прошедшим сроком считается просроченной
+OPEN_TASK_STATUSES = ("pending", "in_progress")
+
+# Конфигурации полнотекстового поиска PostgreSQL: слова задач приводятся к основе (russian приводит к основе
+# и английские слова), имена и должности сотрудников только к нижнему регистру.
+# Конфигурация входит в выражение столбца search_vector, поэтому её изменение требует миграции
+TASK_SEARCH_CONFIG = "russian"
+EMPLOYEE_SEARCH_CONFIG = "simple"
+
 
 class UserManager(BaseUserManager):
     """Класс для создания пользователей"""
@@ -37,8 +58,28 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
     def employees_with_count_tasks(self):
-        return self.annotate(active_tasks_count=Count("task", filter=Q(task__status="in_progress"))).order_by(
-            "last_name"
+        """Сотрудники со счётчиками задач, которые хранятся в самой таблице сотрудников.
+
+        Количество просроченных задач зависит от текущего времени, поэтому считается в том же запросе
+        подзапросом по задачам сотрудника (overdue_tasks_count).
+        """
+        # COUNT(*) без GROUP BY: подзапрос читает только индекс task_overdue_employee_idx
+        overdue = (
+            Task.objects.overdue()
+            .filter(employee=OuterRef("pk"))
+            .order_by()
+            .annotate(count=Func(template="COUNT(*)", output_field=models.IntegerField()))
+            .values("count")
+        )
+        return self.annotate(overdue_tasks_count=Subquery(overdue)).order_by("last_name", "id")
+
+    def busy_employees(self):
+        """Сотрудники с их задачами в работе, отсортированные по загруженности"""
+        active_tasks = Task.objects.filter(status="in_progress").order_by("title_task", "id")
+        return (
+            self.employees_with_count_tasks()
+            .prefetch_related(Prefetch("task_set", queryset=active_tasks))
+            .order_by("-active_tasks_count", "id")
         )
 
 
@@ -68,6 +109,48 @@ class Employee(AbstractUser):
         help_text="Введите должность",
     )
 
+    pending_tasks_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Задач в ожидании",
+        help_text="Количество задач сотрудника в ожидании",
+    )
+
+    active_tasks_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Задач в работе",
+        help_text="Количество задач сотрудника в процессе выполнения",
+    )
+
+    completed_tasks_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Выполненных задач",
+        help_text="Количество выполненных задач сотрудника",
+    )
+
+    canceled_tasks_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Отменённых задач",
+        help_text="Количество отменённых задач сотрудника",
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата обновления",
+        help_text="Дата обновления сотрудника",
+    )
+
+    search_vector = models.GeneratedField(
+        expression=SearchVector("last_name", "first_name", "position", config=EMPLOYEE_SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор",
+        help_text="Слова фамилии, имени и должности для полнотекстового поиска",
+    )
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     objects = UserManager()
@@ -76,10 +159,115 @@ class Employee(AbstractUser):
         verbose_name = "Сотрудник"
         verbose_name_plural = "Сотрудники"
         ordering = ["last_name"]
+        indexes = [
+            models.Index(fields=["-active_tasks_count", "id"], name="employee_busy_idx"),
+            GinIndex(fields=["search_vector"], name="employee_search_idx"),
+        ]
 
     def __str__(self):
         return f"Пользователь  {self.first_name} {self.last_name} {self.email}"
 
+    def save(self, *args, **kwargs):
+        """Сохраняет сотрудника, не перезаписывая счётчики задач устаревшими значениями из памяти"""
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name not in TASK_COUNTER_FIELDS.values()
+            ]
+        super().save(*args, **kwargs)
+
+
+# Условия перехода рекурсивного обхода иерархии задач: к подзадачам и к родительской задаче
+SUBTREE_JOIN = "child.parent_task_id = walk.id"
+ANCESTORS_JOIN = "child.id = walk.parent_task_id"
+
+
+class TaskQuerySet(models.QuerySet):
+    """Выборки задач"""
+
+    def overdue(self):
+        """Незавершённые задачи с прошедшим сроком"""
+        return self.filter(status__in=OPEN_TASK_STATUSES, deadline__lt=Now())
+
+    def due_soon(self, within):
+        """Незавершённые задачи, срок которых наступит в ближайшие within (timedelta)"""
+        return self.filter(status__in=OPEN_TASK_STATUSES, deadline__gte=Now(), deadline__lt=Now() + within)
+
+    def important(self):
+        """Задачи, которые не взяты в работу, но от которых зависят задачи в работе"""
+        return self.filter(Q(status="pending") & Q(parent_task__isnull=False) & Q(parent_task__status="in_progress"))
+
+    def subtree(self, task_id, max_depth):
+        """Задача и все её подзадачи до глубины max_depth одним рекурсивным запросом.
+
+        У каждой задачи есть атрибуты depth (0 - сама задача) и cycle (задача уже встречалась выше по ветке).
+        """
+        return self.raw(self._walk_sql(SUBTREE_JOIN) + self._walk_tasks_sql(), [task_id, max_depth])
+
+    def ancestors(self, task_id, max_depth):
+        """Задача и цепочка её родительских задач до глубины max_depth одним рекурсивным запросом.
+
+        У каждой задачи есть атрибуты depth (0 - сама задача) и cycle (задача уже встречалась в цепочке).
+        """
+        return self.raw(self._walk_sql(ANCESTORS_JOIN) + self._walk_tasks_sql(), [task_id, max_depth])
+
+    def subtree_height(self, task_id, max_depth):
+        """Глубина самой глубокой подзадачи (не больше max_depth), 0 - если подзадач нет"""
+        with connection.cursor() as cursor:
+            cursor.execute(self._walk_sql(SUBTREE_JOIN) + "SELECT MAX(depth) FROM walk", [task_id, max_depth])
+            return cursor.fetchone()[0] or 0
+
+    def hierarchy(self, ancestors_of, subtrees_of, max_depth):
+        """Родительские задачи {id: parent_task_id} для цепочек над задачами ancestors_of и для поддеревьев
+        задач subtrees_of до глубины max_depth одним рекурсивным запросом"""
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        sql = f"""
+            WITH RECURSIVE up AS (
+                SELECT id, parent_task_id, 0 AS depth FROM {table} WHERE id = ANY(%s)
+                UNION
+                SELECT parent.id, parent.parent_task_id, up.depth + 1
+                FROM {table} AS parent
+                JOIN up ON parent.id = up.parent_task_id
+                WHERE up.depth < %s
+            ), down AS (
+                SELECT id, parent_task_id, 0 AS depth FROM {table} WHERE id = ANY(%s)
+                UNION
+                SELECT child.id, child.parent_task_id, down.depth + 1
+                FROM {table} AS child
+                JOIN down ON child.parent_task_id = down.id
+                WHERE down.depth < %s
+            )
+            SELECT id, parent_task_id FROM up UNION SELECT id, parent_task_id FROM down
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(ancestors_of), max_depth, list(subtrees_of), max_depth])
+            return dict(cursor.fetchall())
+
+    def _walk_sql(self, join):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        return f"""
+            WITH RECURSIVE walk AS (
+                SELECT id, parent_task_id, 0 AS depth, ARRAY[id] AS path, false AS cycle
+                FROM {table}
+                WHERE id = %s
+                UNION ALL
+                SELECT child.id, child.parent_task_id, walk.depth + 1, walk.path || child.id, child.id = ANY(walk.path)
+                FROM {table} AS child
+                JOIN walk ON {join}
+                WHERE NOT walk.cycle AND walk.depth < %s
+            )
+        """
+
+    def _walk_tasks_sql(self):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        return f"""
+            SELECT task.*, walk.depth, walk.cycle
+            FROM walk
+            JOIN {table} AS task ON task.id = walk.id
+            ORDER BY walk.path
+        """
+
 
 class Task(models.Model):
     """Класс для создания задач"""
@@ -91,6 +279,14 @@ class Task(models.Model):
         ("canceled", "отменена"),
     ]
 
+    external_id = models.CharField(
+        max_length=64,
+        unique=True,
+        **NULLABLE,
+        verbose_name="Внешний ключ",
+        help_text="Ключ задачи во внешней системе, по нему связываются задачи при импорте",
+    )
+
     title_task = models.CharField(
         max_length=150,
         verbose_name="Название задачи",
@@ -142,10 +338,202 @@ class Task(models.Model):
         help_text="Дата обновления задачи",
     )
 
+    # Столбец вычисляет PostgreSQL при каждой записи задачи; совпадения в названии весят больше, чем в описании
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title_task", weight="A", config=TASK_SEARCH_CONFIG)
+        + SearchVector("task_description", weight="B", config=TASK_SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор",
+        help_text="Слова названия и описания задачи для полнотекстового поиска",
+    )
+
+    objects = TaskQuerySet.as_manager()
+
     def __str__(self):
         return f"Задача {self.title_task} {self.employee} {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус и сотрудник на момент загрузки: по ним считается изменение загруженности для событий (signals.py)
+        instance._loaded_workload = (instance.__dict__.get("status"), instance.__dict__.get("employee_id"))
+        return instance
+
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
-        ordering = ["employee", "title_task", "status"]
+        ordering = ["employee_id", "title_task", "id"]
+        indexes = [
+            models.Index(fields=["employee", "title_task", "id"], name="task_ordering_idx"),
+            models.Index(fields=["employee"], name="task_in_progress_idx", condition=Q(status="in_progress")),
+            models.Index(
+                fields=["parent_task"],
+                name="task_pending_subtask_idx",
+                condition=Q(status="pending", parent_task__isnull=False),
+            ),
+            models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+            models.Index(
+                fields=["deadline", "id"],
+                name="task_open_deadline_idx",
+                condition=Q(status__in=OPEN_TASK_STATUSES, deadline__isnull=False),
+            ),
+            # Подсчёт просроченных задач сотрудника без чтения таблицы задач (employees_with_count_tasks)
+            models.Index(
+                fields=["employee", "deadline"],
+                name="task_overdue_employee_idx",
+                condition=Q(status__in=OPEN_TASK_STATUSES, deadline__isnull=False),
+            ),
+            GinIndex(fields=["search_vector"], name="task_search_idx"),
+        ]
+
+
+class TaskTombstone(models.Model):
+    """Класс для записей об удалённых задачах, по которым клиенты синхронизируют удаления"""
+
+    task_id = models.BigIntegerField(
+        verbose_name="ID задачи",
+        help_text="ID удалённой задачи",
+    )
+
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата удаления",
+        help_text="Дата удаления задачи",
+    )
+
+    class Meta:
+        verbose_name = "Удалённая задача"
+        verbose_name_plural = "Удалённые задачи"
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"Задача {self.task_id} удалена {self.deleted_at}"
+
+
+class WorkloadSnapshotQuerySet(models.QuerySet):
+    """Выборки снимков загруженности"""
+
+    def take(self, date, now):
+        """Снимок загруженности всех сотрудников за дату одним запросом INSERT ... SELECT.
+
+        Счётчики по статусам берутся из таблицы сотрудников, просроченные задачи (срок раньше now) считаются
+        одним проходом по задачам. Повторный снимок за ту же дату заменяет предыдущий. Возвращает количество
+        сотрудников в снимке.
+        """
+        snapshot_table = connection.ops.quote_name(self.model._meta.db_table)
+        employee_table = connection.ops.quote_name(Employee._meta.db_table)
+        task_table = connection.ops.quote_name(Task._meta.db_table)
+        fields = [*TASK_COUNTER_FIELDS.values(), "overdue_tasks_count"]
+
+        counters = ", ".join(f"e.{field}" for field in TASK_COUNTER_FIELDS.values())
+        updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in [*fields, "created_at"])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {snapshot_table} (employee_id, date, {", ".join(fields)}, created_at)
+                SELECT e.id, %s, {counters}, COALESCE(overdue.count, 0), %s
+                FROM {employee_table} AS e
+                LEFT JOIN (
+                    SELECT employee_id, COUNT(*) AS count
+                    FROM {task_table}
+                    WHERE deadline < %s AND status = ANY(%s)
+                    GROUP BY employee_id
+                ) AS overdue ON overdue.employee_id = e.id
+                ON CONFLICT (employee_id, date) DO UPDATE SET {updates}
+                """,
+                [date, now, now, list(OPEN_TASK_STATUSES)],
+            )
+            return cursor.rowcount
+
+
+class WorkloadSnapshot(models.Model):
+    """Класс для ежедневных снимков загруженности сотрудников"""
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="workload_snapshots",
+        verbose_name="Сотрудник",
+        help_text="Сотрудник, загруженность которого сохранена",
+    )
+
+    date = models.DateField(
+        verbose_name="Дата",
+        help_text="Дата снимка",
+    )
+
+    pending_tasks_count = models.PositiveIntegerField(
+        verbose_name="Задач в ожидании",
+        help_text="Количество задач сотрудника в ожидании",
+    )
+
+    active_tasks_count = models.PositiveIntegerField(
+        verbose_name="Задач в работе",
+        help_text="Количество задач сотрудника в процессе выполнения",
+    )
+
+    completed_tasks_count = models.PositiveIntegerField(
+        verbose_name="Выполненных задач",
+        help_text="Количество выполненных задач сотрудника",
+    )
+
+    canceled_tasks_count = models.PositiveIntegerField(
+        verbose_name="Отменённых задач",
+        help_text="Количество отменённых задач сотрудника",
+    )
+
+    overdue_tasks_count = models.PositiveIntegerField(
+        verbose_name="Просроченных задач",
+        help_text="Количество незавершённых задач сотрудника с прошедшим сроком",
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания",
+        help_text="Время, на которое посчитан снимок",
+    )
+
+    objects = WorkloadSnapshotQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Снимок загруженности"
+        verbose_name_plural = "Снимки загруженности"
+        ordering = ["employee_id", "date"]
+        constraints = [
+            # Индекс ограничения используется и для выборки истории сотрудника за период
+            models.UniqueConstraint(fields=["employee", "date"], name="workload_snapshot_employee_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Загруженность {self.employee_id} на {self.date}"
+
+
+class DataVersionQuerySet(models.QuerySet):
+    def current(self):
+        """Текущая версия данных или None, если строки ещё нет (например, сразу после очистки таблиц)"""
+        return self.values_list("version", flat=True).first()
+
+
+class DataVersion(models.Model):
+    """Класс для версии данных задач и сотрудников.
+
+    В таблице одна строка. Перед каждым изменяющим оператором над задачами или сотрудниками триггер (миграция 0011)
+    записывает в неё следующее значение последовательности, поэтому версия меняется в той же транзакции, что и данные,
+    при любом способе записи (ORM, QuerySet.update, COPY загрузки) и из любого процесса.
+    """
+
+    version = models.BigIntegerField(
+        verbose_name="Версия",
+        help_text="Номер последнего изменения задач или сотрудников",
+    )
+
+    objects = DataVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Версия данных"
+        verbose_name_plural = "Версии данных"
+
+    def __str__(self):
+        return f"Версия данных {self.version}"
@@ -1,4 +1,16 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class EmployeeTaskPaginator(PageNumberPagination):
@@ -7,3 +19,195 @@ class EmployeeTaskPaginator(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class EmployeeTaskCursorPaginator(BasePagination):
+    """Курсорная (keyset) пагинация для сотрудников и задач.
+
+    Страница выбирается условием "строки после последней строки предыдущей страницы" по уникальной
+    сортировке представления (``cursor_ordering``), поэтому глубокие страницы стоят столько же, сколько первая,
+    а общее количество строк не считается. Допускающим NULL может быть только первое поле сортировки:
+    строки с NULL в нём выбираются отдельным запросом в том же порядке, что и в PostgreSQL.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = EmployeeTaskPaginator.page_size
+    page_size_query_param = EmployeeTaskPaginator.page_size_query_param
+    max_page_size = EmployeeTaskPaginator.max_page_size
+    invalid_cursor_message = "Неверный курсор"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(view.cursor_ordering)
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        self.page = []
+        limit = self.page_size + 1
+        for segment in self.get_segments(queryset, position):
+            self.page.extend(segment.order_by(*self.ordering)[: limit - len(self.page)])
+            if len(self.page) >= limit:
+                break
+
+        self.has_next = len(self.page) > self.page_size
+        self.page = self.page[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_segments(self, queryset, position):
+        """Наборы строк после курсора в порядке сортировки"""
+        first, *rest = self.ordering
+        name = first.lstrip("-")
+        descending = first.startswith("-")
+
+        if not queryset.model._meta.get_field(name).null:
+            if position is not None:
+                after = self.get_anchor(first, position[0]) & self.get_after(self.ordering, position)
+                queryset = queryset.filter(after)
+            return [queryset]
+
+        # В PostgreSQL NULL идут последними при сортировке по возрастанию и первыми при сортировке по убыванию
+        not_null = queryset.filter(**{f"{name}__isnull": False})
+        null = queryset.filter(**{f"{name}__isnull": True})
+        segments = [null, not_null] if descending else [not_null, null]
+        if position is None:
+            return segments
+
+        if position[0] is None:
+            after = self.get_after(rest, position[1:])
+            null = null.filter(after) if after is not None else null.none()
+            return [null, not_null] if descending else [null]
+
+        not_null = not_null.filter(self.get_anchor(first, position[0]) & self.get_after(self.ordering, position))
+        return [not_null] if descending else [not_null, null]
+
+    @staticmethod
+    def get_anchor(field, value):
+        """Условие на первое поле сортировки, по которому PostgreSQL начинает сканирование индекса"""
+        name = field.lstrip("-")
+        lookup = "lte" if field.startswith("-") else "gte"
+        return Q(**{f"{name}__{lookup}": value})
+
+    @staticmethod
+    def get_after(ordering, position):
+        """Условие "строка после позиции курсора" для полей сортировки без NULL"""
+        conditions = []
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            conditions.append(equal & Q(**{f"{name}__{lookup}": value}))
+            equal &= Q(**{name: value})
+        return reduce(or_, conditions) if conditions else None
+
+    def decode_cursor(self, request, model):
+        """Позиция курсора: значения полей сортировки, приведённые к типам полей модели"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [self.to_python(model, field, value) for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, ValidationError):
+            # Курсор подходящей длины, но со значениями не тех типов (например, собранный вручную)
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def to_python(model, field, value):
+        field = model._meta.get_field(field.lstrip("-"))
+        if value is None and not field.null:
+            raise ValueError(f"{field.name} не может быть NULL")
+        return field.to_python(value)
+
+    def encode_cursor(self, row):
+        position = [self.get_position_value(row, field.lstrip("-")) for field in self.ordering]
+        return urlsafe_b64encode(json.dumps(position, cls=DjangoJSONEncoder).encode("ascii")).decode("ascii")
+
+    @staticmethod
+    def get_position_value(row, name):
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        # DjangoJSONEncoder округляет время до миллисекунд, а курсору нужна точность поля:
+        # иначе строки с тем же временем до миллисекунды повторятся на следующей странице
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": f"http://api.example.org/task/?{self.cursor_query_param}=WzEsICJ0YXNrIiwgMl0=",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор следующей страницы (пустое значение - первая страница)",
+                "schema": {"type": "string"},
+            },
+        ]
+        if self.page_size_query_param is not None:
+            parameters.append(
+                {
+                    "name": self.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Количество результатов на странице",
+                    "schema": {"type": "integer"},
+                }
+            )
+        return parameters
+
+
+class CursorPaginationMixin:
+    """Включает курсорную пагинацию, если в запросе передан параметр ``cursor``.
+
+    Без параметра используется обычная постраничная пагинация ``pagination_class``.
+    """
+
+    cursor_pagination_class = EmployeeTaskCursorPaginator
+    cursor_ordering = ("id",)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            cursor_query_param = self.cursor_pagination_class.cursor_query_param
+            if self.request is not None and cursor_query_param in self.request.query_params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
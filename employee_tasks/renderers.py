@@ -0,0 +1,151 @@
+import csv
+import json
+from datetime import date, datetime
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Количество строк, которые отдаются клиенту одним куском потокового ответа
+STREAM_BATCH_SIZE = 500
+
+
+def is_asgi(request):
+    """Запрос обрабатывается ASGI-сервером (APP_SERVER=asgi): потоковые ответы можно отдавать асинхронно"""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+async def iterate_async(iterator):
+    """Асинхронный итератор по синхронному: каждый элемент читается через sync_to_async.
+
+    Под ASGI Django собирает синхронный потоковый ответ в список до отправки первого байта, а так элементы
+    (порции строк из серверного курсора) отдаются клиенту по одному. Все шаги выполняются в одном потоке
+    (thread_sensitive), поэтому курсор остаётся в соединении с базой, в котором был открыт.
+    """
+    next_item, done = sync_to_async(next), object()
+    try:
+        while (item := await next_item(iterator, done)) is not done:
+            yield item
+    finally:
+        # Клиент отключился раньше: курсор закрывается сразу, а не при сборке мусора
+        await sync_to_async(iterator.close)()
+
+
+def encode_value(value):
+    """Значение из базы в виде, в котором его отдаёт API (даты - ISO 8601, UTC - с суффиксом Z)"""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return value
+
+
+def json_default(value):
+    """Значения, которые модуль json не умеет сериализовать сам"""
+    if isinstance(value, (datetime, date)):
+        return encode_value(value)
+    return str(value)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON-ответы API через orjson: в несколько раз быстрее модуля json на списках задач и сотрудников.
+
+    Даты и время кодируются как в остальных ответах (encode_value), прочие неизвестные orjson значения
+    (Decimal, ленивые строки) - строкой. Ответы с отступами (параметр indent в Accept) рендерит JSONRenderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=json_default, option=self.options)
+
+
+class StreamingRenderer(BaseRenderer):
+    """Рендерер для потоковой выгрузки строк из базы без создания моделей и сериализаторов"""
+
+    filename_extension = None
+
+    def streaming_response(self, rows, header, filename, asynchronous=False):
+        """Потоковый ответ из строк rows (кортежей значений в порядке header); под ASGI - asynchronous=True"""
+        content_type = f"{self.media_type}; charset={self.charset}"
+        content = self.stream(rows, header)
+        if asynchronous:
+            content = iterate_async(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}.{self.filename_extension}"'
+        return response
+
+    def stream(self, rows, header):
+        batch = []
+        for row in rows:
+            batch.append(self.render_row(row, header))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+    def render_row(self, row, header):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Выгрузка в формате NDJSON: один JSON-объект на строку"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+    filename_extension = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False, default=json_default) + "\n"
+
+    def render_row(self, row, header):
+        return json.dumps(dict(zip(header, row)), ensure_ascii=False, default=json_default) + "\n"
+
+
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку вместо сохранения"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """Выгрузка в формате CSV с заголовком"""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+    filename_extension = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return self.writer.writerow(data.keys()) + self.writer.writerow(map(encode_value, data.values()))
+
+    def stream(self, rows, header):
+        yield self.writer.writerow(header)
+        yield from super().stream(rows, header)
+
+    def render_row(self, row, header):
+        return self.writer.writerow(map(encode_value, row))
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Поток событий text/event-stream (server-sent events); ошибки отдаются событием error"""
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"event: error\ndata: {json.dumps(data, ensure_ascii=False, default=json_default)}\n\n"
@@ -0,0 +1,96 @@
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# Алиас кеша закреплений за основной базой в settings.CACHES
+REPLICA_PIN_CACHE_ALIAS = "replica_pins"
+
+
+def database_aliases():
+    """Основная база и её реплики"""
+    return {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+
+def choose_replica():
+    """Случайная реплика или основная база, если реплик нет"""
+    return random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else DEFAULT_DB_ALIAS
+
+
+def pin_cache():
+    return caches[REPLICA_PIN_CACHE_ALIAS]
+
+
+def pinned_key(user):
+    return f"replica:pinned:{user.pk}"
+
+
+def pin_to_primary(user):
+    """После изменения данных сотрудник DATABASE_REPLICA_LAG секунд читает с основной базы (read-your-writes).
+
+    Закрепление хранится в общем для всех процессов кеше replica_pins (см. checks.check_replica_pin_cache).
+    """
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        pin_cache().set(pinned_key(user), True, settings.DATABASE_REPLICA_LAG)
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and pin_cache().get(pinned_key(user), False)
+
+
+class PrimaryReplicaRouter:
+    """Запись всегда в основную базу, реплики в одной связке с ней.
+
+    Чтение по умолчанию тоже из основной базы: реплику выбирают явно представления из ``ReplicaReadMixin``
+    (queryset.using), а связанные объекты читаются из той же базы, что и объект, от которого они получены.
+    """
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = database_aliases()
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему репликацией с основной базы
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """Читает данные действий из ``replica_actions`` с реплики.
+
+    Реплика выбирается только для безопасных запросов сотрудника, который не менял данные последние
+    DATABASE_REPLICA_LAG секунд; после изменяющего запроса сотрудник закрепляется за основной базой.
+    Queryset привязывается к базе сразу, поэтому и потоковые ответы, которые читаются после выхода
+    из представления, идут в ту же базу.
+    """
+
+    replica_actions = ()
+    read_database = DEFAULT_DB_ALIAS
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_pinned_to_primary(request.user)
+        ):
+            self.read_database = choose_replica()
+
+    def get_queryset(self):
+        return super().get_queryset().using(self.read_database)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    @property
+    def reads_from_replica(self):
+        return self.read_database != DEFAULT_DB_ALIAS
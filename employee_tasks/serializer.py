@@ -1,24 +1,260 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from employee_tasks.models import Employee, Task
+from employee_tasks.events import publish_reset
+from employee_tasks.models import Employee, Task, WorkloadSnapshot
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связанный объект по первичному ключу, который сначала ищется среди загруженных заранее для всего списка"""
+
+    def to_internal_value(self, data):
+        related_objects = self.context.get("related_objects", {}).get(self.queryset.model, {})
+        pk = int(data) if isinstance(data, str) and data.isdigit() else data
+        if isinstance(pk, int) and not isinstance(pk, bool) and pk in related_objects:
+            return related_objects[pk]
+        return super().to_internal_value(data)
+
+
+def parse_pk(value):
+    """Первичный ключ из данных запроса (число или строка из цифр) или None"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return int(value) if isinstance(value, str) and value.isdigit() else None
+
+
+class TaskHierarchy:
+    """Иерархия задач после сохранения списка: связи из базы вокруг задач списка, заменённые связями из данных.
+
+    Позволяет проверить цикл и глубину для каждой строки без запросов к базе, с учётом всех строк списка.
+    """
+
+    def __init__(self, parents):
+        self.parents = parents
+        self.children = {}
+        for task_id, parent_id in parents.items():
+            self.children.setdefault(parent_id, []).append(task_id)
+
+    def chain_length(self, parent_id, task_id, max_depth):
+        """Количество задач в цепочке от parent_id вверх (не больше max_depth + 1) или None, если цепочка
+        приходит к task_id или замыкается"""
+        chain = set()
+        while parent_id is not None and len(chain) <= max_depth:
+            if parent_id == task_id or parent_id in chain:
+                return None
+            chain.add(parent_id)
+            parent_id = self.parents.get(parent_id)
+        return len(chain)
+
+    def subtree_height(self, task_id, max_depth):
+        """Глубина самой глубокой подзадачи (не больше max_depth), 0 - если подзадач нет"""
+        height, level, seen = 0, [task_id], {task_id}
+        while height < max_depth:
+            level = [child for parent in level for child in self.children.get(parent, ()) if child not in seen]
+            if not level:
+                break
+            seen.update(level)
+            height += 1
+        return height
+
+
+class SparseFieldsetSerializerMixin:
+    """Оставляет в сериализаторе только поля из ``context["fields"]`` (параметры fields= и exclude=).
+
+    Сужается сериализатор верхнего уровня или элемента списка; вложенные сериализаторы отдают все поля.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get("fields")
+        if names is None or self.root not in (self, self.parent):
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+    def value_columns(self):
+        """Поля ответа для строк .values(): (имя поля, столбец модели, преобразование значения или None)"""
+        columns = []
+        for field in self._readable_fields:
+            column = self.Meta.model._meta.get_field(field.source).attname
+            # Связанный объект отдаётся первичным ключом, который уже есть в столбце
+            convert = None if isinstance(field, serializers.RelatedField) else field.to_representation
+            columns.append((field.field_name, column, convert))
+        return columns
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """Сериализатор для массового создания и изменения задач.
+
+    Связанные объекты для всего списка загружаются одним запросом на каждое поле, иерархия задач для проверки
+    parent_task - одним запросом на весь список, сохранение выполняется через bulk_create/bulk_update.
+    При изменении instance - словарь задач по id, каждая строка данных должна содержать id.
+    Страница строк .values() (быстрый путь списков, см. SparseFieldsetMixin) сериализуется по столбцам,
+    без создания моделей и обхода полей сериализатора для каждой задачи.
+    """
+
+    def to_representation(self, data):
+        if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+            return super().to_representation(data)
+
+        columns = self.child.value_columns()
+        results = []
+        for row in data:
+            item = {}
+            for name, column, convert in columns:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            results.append(item)
+        return results
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context["related_objects"] = self.load_related_objects(data)
+            self._context["task_hierarchy"] = self.load_task_hierarchy(data)
+        return super().to_internal_value(data)
+
+    def load_related_objects(self, data):
+        related_objects = {}
+        for name, field in self.child.fields.items():
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and not field.read_only:
+                ids = {item.get(name) for item in data if isinstance(item, dict)}
+                ids = {int(pk) for pk in ids if isinstance(pk, int) or (isinstance(pk, str) and pk.isdigit())}
+                related_objects[field.queryset.model] = field.queryset.in_bulk(ids)
+        return related_objects
+
+    def load_task_hierarchy(self, data):
+        """Иерархия задач с родительскими задачами из строк списка (см. TaskHierarchy)"""
+        proposed, ancestors_of = {}, set()
+        for item in data:
+            if not isinstance(item, dict) or "parent_task" not in item:
+                continue
+            parent_id = parse_pk(item["parent_task"])
+            if parent_id is None and item["parent_task"] is not None:
+                continue
+            if parent_id is not None:
+                ancestors_of.add(parent_id)
+            task_id = parse_pk(item.get("id"))
+            if self.instance is not None and task_id in self.instance:
+                proposed[task_id] = parent_id
+
+        parents = Task.objects.hierarchy(ancestors_of, proposed, settings.TASK_MAX_DEPTH) if ancestors_of else {}
+        parents.update(proposed)
+        return TaskHierarchy(parents)
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            task_id = data.get("id") if isinstance(data, dict) else None
+            self.child.instance = self.instance.get(int(task_id)) if str(task_id).isdigit() else None
+            if self.child.instance is None:
+                raise serializers.ValidationError({"id": ["Задача не найдена"]})
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        # bulk_create и bulk_update не отправляют сигналы: клиентов событий оповещаем сами
+        publish_reset()
+        return Task.objects.bulk_create(Task(**attrs) for attrs in validated_data)
+
+    def update(self, instance, validated_data):
+        tasks = []
+        updated_at = timezone.now()
+        for data, attrs in zip(self.initial_data, validated_data):
+            task = instance[int(data["id"])]
+            for field, value in attrs.items():
+                setattr(task, field, value)
+            # bulk_update не вызывает save(), поэтому auto_now поле обновляется явно
+            task.updated_at = updated_at
+            tasks.append(task)
+
+        fields = {field for attrs in validated_data for field in attrs} | {"updated_at"}
+        Task.objects.bulk_update(tasks, sorted(fields))
+        publish_reset()
+        return tasks
+
+
+class TaskSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для задач"""
 
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
     class Meta:
         model = Task
-        fields = "__all__"
+        exclude = ("search_vector",)
+        list_serializer_class = TaskListSerializer
+
+    def validate_parent_task(self, parent_task):
+        """Проверяет, что родительская задача не образует цикл и не превышает допустимую глубину иерархии.
+
+        При сохранении списка задач (TaskListSerializer) проверка идёт по иерархии с изменениями всех строк списка.
+        """
+        instance = self.instance if isinstance(self.instance, Task) else None
+        if parent_task is None or (instance is not None and instance.parent_task_id == parent_task.pk):
+            return parent_task
+
+        max_depth = settings.TASK_MAX_DEPTH
+        hierarchy = self.context.get("task_hierarchy")
+        if hierarchy is None:
+            chain = list(Task.objects.ancestors(parent_task.pk, max_depth))
+            cycle = any(task.cycle or (instance is not None and task.pk == instance.pk) for task in chain)
+            depth = None if cycle else len(chain)
+        else:
+            depth = hierarchy.chain_length(parent_task.pk, instance.pk if instance is not None else None, max_depth)
+        if depth is None:
+            raise serializers.ValidationError("Родительская задача образует цикл в иерархии задач")
+
+        # Глубина задачи - количество её родительских задач; при переносе задачи вместе с ней переносятся подзадачи
+        if instance is not None and depth <= max_depth:
+            if hierarchy is None:
+                depth += Task.objects.subtree_height(instance.pk, max_depth)
+            else:
+                depth += hierarchy.subtree_height(instance.pk, max_depth)
+        if depth > max_depth:
+            raise serializers.ValidationError(f"Превышена максимальная глубина иерархии задач: {max_depth}")
+        return parent_task
+
+
+class TaskTreeSerializer(TaskSerializer):
+    """Сериализатор для задач в иерархии с глубиной относительно исходной задачи"""
+
+    depth = serializers.IntegerField(read_only=True)
+
+
+class TaskStatusTransitionSerializer(serializers.Serializer):
+    """Сериализатор для массовой смены статуса задач"""
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+
+class TaskAssignmentSerializer(serializers.Serializer):
+    """Сериализатор для рекомендованных исполнителей важных задач"""
+
+    task_id = serializers.IntegerField()
+    task = serializers.CharField()
+    deadline = serializers.DateTimeField(allow_null=True)
+    employees = serializers.ListField(child=serializers.CharField())
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
     """Сериализатор для сотрудников"""
 
     active_tasks_count = serializers.IntegerField(read_only=True)
+    overdue_tasks_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Employee
-        fields = ("id", "email", "first_name", "last_name", "position", "active_tasks_count")
+        fields = (
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "position",
+            "active_tasks_count",
+            "pending_tasks_count",
+            "completed_tasks_count",
+            "canceled_tasks_count",
+            "overdue_tasks_count",
+        )
 
 
 class BusyEmployeeSerializer(serializers.ModelSerializer):
@@ -32,6 +268,21 @@ class BusyEmployeeSerializer(serializers.ModelSerializer):
         fields = ("id", "email", "first_name", "last_name", "position", "task_set", "active_tasks_count")
 
 
+class WorkloadSnapshotSerializer(serializers.ModelSerializer):
+    """Сериализатор для снимков загруженности сотрудника"""
+
+    class Meta:
+        model = WorkloadSnapshot
+        fields = (
+            "date",
+            "pending_tasks_count",
+            "active_tasks_count",
+            "completed_tasks_count",
+            "canceled_tasks_count",
+            "overdue_tasks_count",
+        )
+
+
 class EmployeeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
@@ -0,0 +1,191 @@
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from employee_tasks.events import publish_reset
+from employee_tasks.models import Employee, Task, TaskTombstone
+from employee_tasks.paginators import EmployeeTaskCursorPaginator
+from employee_tasks.serializer import TaskSerializer
+
+# Владелец родительской задачи получает задачу, если у него не больше чем на столько задач больше,
+# чем у наименее загруженного сотрудника
+PARENT_OWNER_MAX_EXTRA_TASKS = 2
+
+# Размер порции для массовых операций с задачами: одна транзакция и один запрос на запись на порцию
+BULK_CHUNK_SIZE = 500
+
+
+def load_tasks(queryset):
+    """Задачи для распределения вместе с исполнителем родительской задачи (один запрос)"""
+    return list(
+        queryset.order_by(F("deadline").asc(nulls_last=True), "id").values(
+            "id", "title_task", "deadline", parent_owner_id=F("parent_task__employee_id")
+        )
+    )
+
+
+def load_workloads():
+    """Активные сотрудники и количество их задач в работе (один запрос)"""
+    return list(Employee.objects.filter(is_active=True).values("id", "first_name", "last_name", "active_tasks_count"))
+
+
+def recommend_employees(tasks, workloads):
+    """Подбирает исполнителя для каждой задачи.
+
+    Задачу берёт наименее загруженный сотрудник либо исполнитель родительской задачи, если у него не больше чем
+    на ``PARENT_OWNER_MAX_EXTRA_TASKS`` задач больше. Загруженность хранится в куче и увеличивается после каждой
+    рекомендации, поэтому задачи одного набора распределяются между сотрудниками равномерно.
+    """
+    loads = {employee["id"]: employee["active_tasks_count"] for employee in workloads}
+    names = {employee["id"]: f"{employee['last_name']} {employee['first_name']}" for employee in workloads}
+    heap = [(load, employee_id) for employee_id, load in loads.items()]
+    heapq.heapify(heap)
+
+    recommendations = []
+    for task in tasks:
+        # В куче могут остаться записи с устаревшей загруженностью: загруженность только растёт, их можно выбросить
+        while heap and heap[0][0] != loads[heap[0][1]]:
+            heapq.heappop(heap)
+
+        employee_id = None
+        if heap:
+            least_load, employee_id = heap[0]
+            owner_id = task["parent_owner_id"]
+            if owner_id in loads and loads[owner_id] <= least_load + PARENT_OWNER_MAX_EXTRA_TASKS:
+                employee_id = owner_id
+            loads[employee_id] += 1
+            heapq.heappush(heap, (loads[employee_id], employee_id))
+
+        recommendations.append(
+            {
+                "task_id": task["id"],
+                "task": task["title_task"],
+                "deadline": task["deadline"],
+                "employee_id": employee_id,
+                "employees": [names[employee_id]] if employee_id is not None else [],
+            }
+        )
+    return recommendations
+
+
+def assign_tasks(queryset):
+    """Рекомендации исполнителей для задач из queryset за два запроса к базе"""
+    return recommend_employees(load_tasks(queryset), load_workloads())
+
+
+def bulk_save_tasks(items, context, update=False):
+    """Массово создаёт (или изменяет при update=True) задачи порциями по BULK_CHUNK_SIZE.
+
+    Каждая порция проверяется через TaskSerializer(many=True) (иерархия задач - с учётом всех строк порции)
+    и сохраняется одним bulk_create/bulk_update в своей транзакции; строки с ошибками пропускаются. Возвращает
+    сохранённые задачи с номерами строк и ошибки по строкам.
+    """
+    saved, errors = [], []
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        end = start + BULK_CHUNK_SIZE
+        chunk = list(enumerate(items[start:end], start=start))
+        with transaction.atomic():
+            instances = None
+            if update:
+                ids = [item.get("id") for _, item in chunk if isinstance(item, dict)]
+                instances = Task.objects.in_bulk([pk for pk in ids if str(pk).isdigit()])
+
+            # Без строки с ошибкой у её задачи остаётся родительская задача из базы, и иерархия других строк
+            # может измениться (например, появиться цикл), поэтому оставшиеся строки проверяются заново
+            while chunk:
+                serializer = TaskSerializer(instances, data=[item for _, item in chunk], many=True, context=context)
+                if serializer.is_valid():
+                    saved.extend(zip((index for index, _ in chunk), serializer.save()))
+                    break
+                chunk_errors = list(zip(chunk, serializer.errors))
+                errors.extend({"index": index, "errors": error} for (index, _), error in chunk_errors if error)
+                chunk = [(index, item) for (index, item), error in chunk_errors if not error]
+    return saved, sorted(errors, key=lambda error: error["index"])
+
+
+def bulk_set_status(ids, status):
+    """Переводит задачи в статус status порциями по BULK_CHUNK_SIZE, одним UPDATE на порцию.
+
+    Возвращает количество изменённых задач и id задач, которые не найдены.
+    """
+    updated, not_found = 0, []
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        end = start + BULK_CHUNK_SIZE
+        chunk = ids[start:end]
+        with transaction.atomic():
+            found = set(Task.objects.select_for_update().filter(id__in=chunk).values_list("id", flat=True))
+            updated += Task.objects.filter(id__in=found).update(status=status, updated_at=timezone.now())
+            # QuerySet.update не отправляет сигналы: клиентов событий оповещаем сами
+            publish_reset()
+        not_found.extend(pk for pk in chunk if pk not in found)
+    return updated, not_found
+
+
+def encode_sync_token(position):
+    """Токен синхронизации: позиции (время, id) в изменениях задач и в удалениях"""
+    # DjangoJSONEncoder округляет время до миллисекунд, а позиции нужна точность updated_at
+    position = [value.isoformat() if isinstance(value, datetime) else value for value in position]
+    return urlsafe_b64encode(json.dumps(position).encode("ascii")).decode("ascii")
+
+
+def decode_sync_token(token):
+    """Позиция из токена синхронизации; ValueError, если токен неверный"""
+    try:
+        changed_at, task_id, deleted_at, tombstone_id = json.loads(urlsafe_b64decode(token.encode("ascii")))
+    except (TypeError, ValueError, UnicodeEncodeError):
+        raise ValueError("Неверный токен")
+
+    changed_at, deleted_at = parse_datetime(changed_at or ""), parse_datetime(deleted_at or "")
+    if changed_at is None or deleted_at is None or not isinstance(task_id, int) or not isinstance(tombstone_id, int):
+        raise ValueError("Неверный токен")
+    return [changed_at, task_id, deleted_at, tombstone_id]
+
+
+def after_position(queryset, field, position):
+    """Строки queryset после позиции (значение field, id) в порядке (field, id)"""
+    ordering = (field, "id")
+    after = EmployeeTaskCursorPaginator.get_anchor(field, position[0])
+    after &= EmployeeTaskCursorPaginator.get_after(ordering, position)
+    return queryset.filter(after).order_by(*ordering)
+
+
+def task_changes(position, limit):
+    """Задачи, созданные или изменённые после позиции, и id задач, удалённых после неё, не больше limit каждых.
+
+    position - результат decode_sync_token или None для первой синхронизации (все задачи без удалений).
+    Изменения моложе settings.TASK_SYNC_LAG секунд не отдаются: updated_at проставляется до фиксации
+    транзакции, и строка с более ранним временем может стать видна позже строки с более поздним.
+    Возвращает задачи, id удалённых задач, новую позицию и признак, что изменения ещё остались.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_SYNC_LAG)
+    if position is None:
+        # Удаления до первой синхронизации клиенту не нужны
+        last_tombstone = TaskTombstone.objects.filter(deleted_at__lte=cutoff).order_by("-deleted_at", "-id").first()
+        tombstone_position = [last_tombstone.deleted_at, last_tombstone.id] if last_tombstone else [cutoff, 0]
+        tasks = Task.objects.filter(updated_at__lte=cutoff).order_by("updated_at", "id")
+        position = [None, 0, *tombstone_position]
+    else:
+        tasks = after_position(Task.objects.filter(updated_at__lte=cutoff), "updated_at", position[:2])
+
+    tombstones = after_position(TaskTombstone.objects.filter(deleted_at__lte=cutoff), "deleted_at", position[2:])
+    tasks = list(tasks[: limit + 1])
+    tombstones = list(tombstones.values("id", "task_id", "deleted_at")[: limit + 1])
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+
+    if tasks:
+        position[:2] = [tasks[-1].updated_at, tasks[-1].id]
+    if tombstones:
+        position[2:] = [tombstones[-1]["deleted_at"], tombstones[-1]["id"]]
+    if position[0] is None:
+        # Задач ещё нет: следующая синхронизация начнётся с момента, до которого просмотрены изменения
+        position[:2] = [cutoff, 0]
+    return tasks, [tombstone["task_id"] for tombstone in tombstones], position, has_more
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from employee_tasks.authentication import invalidate_auth_cache
+from employee_tasks.events import publish_task_change
+from employee_tasks.models import Employee, Task, TaskTombstone
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_authenticated_users(sender, **kwargs):
+    """Сбрасывает запомненных пользователей: у сотрудника могли измениться пароль или is_active, или он удалён"""
+    invalidate_auth_cache()
+
+
+@receiver(pre_delete, sender=Task)
+def touch_subtasks(sender, instance, **kwargs):
+    """У подзадач удаляемой задачи parent_task обнуляется запросом в обход save(), обновляем updated_at сами"""
+    Task.objects.filter(parent_task=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Employee)
+def touch_employee_tasks(sender, instance, **kwargs):
+    """У задач удаляемого сотрудника employee обнуляется запросом в обход save(), обновляем updated_at сами"""
+    Task.objects.filter(employee=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone(sender, instance, **kwargs):
+    """Запоминает удаление задачи для клиентов, которые синхронизируют изменения через /task/changes/"""
+    TaskTombstone.objects.create(task_id=instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, **kwargs):
+    """Событие о сохранении задачи; изменение загруженности известно, если задача создана или загружена из базы"""
+    current = (instance.status, instance.employee_id)
+    if created:
+        publish_task_change("created", instance, new=current)
+    elif hasattr(instance, "_loaded_workload"):
+        publish_task_change("updated", instance, old=instance._loaded_workload, new=current)
+    else:
+        publish_task_change("updated", instance)
+    instance._loaded_workload = current
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    publish_task_change("deleted", instance, old=(instance.status, instance.employee_id))
@@ -1,11 +1,47 @@
-from datetime import datetime
+import base64
+import csv
+import gzip
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
 
+import brotli
+import zstandard
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-from employee_tasks.models import Task
+from employee_tasks.cache import response_cache_stats
+from employee_tasks.checks import check_replica_pin_cache
+from employee_tasks.compression import choose_codec, get_codecs
+from employee_tasks.events import RESET_MESSAGE, broker, workload_deltas
+from employee_tasks.instrumentation import QueryRecorder
+from employee_tasks.models import TASK_COUNTER_FIELDS, TASK_SEARCH_CONFIG, Employee, Task, WorkloadSnapshot
+from employee_tasks.paginators import EmployeeTaskCursorPaginator
+from employee_tasks.renderers import ORJSONRenderer
+from employee_tasks.routers import REPLICA_PIN_CACHE_ALIAS, PrimaryReplicaRouter, pinned_key
+from employee_tasks.serializer import TaskSerializer
 from employee_tasks.tests.fabrics import EmployeeFactory, TaskFactory
+from employee_tasks.views import TaskViewSet
+
+EMPLOYEE_ROW = {"email": "ivanov@example.com", "first_name": "Иван", "last_name": "Иванов", "position": "Разработчик"}
 
 
 class BaseEmployeeTests(APITestCase):
@@ -13,6 +49,28 @@ class BaseEmployeeTests(APITestCase):
         self.employee = EmployeeFactory()
         self.client.force_authenticate(user=self.employee)
 
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """Проверяет, что в блоке выполнено не больше budget запросов к базе (во всех подключениях)"""
+        recorder = QueryRecorder(keep_statements=True)
+        with recorder.record():
+            yield recorder
+        self.assertLessEqual(
+            recorder.count, budget, "Запросы к базе сверх бюджета:\n" + "\n".join(recorder.statements)
+        )
+
+    def async_get(self, url, data=None, **headers):
+        """GET через ASGI-обработчик (как при APP_SERVER=asgi) с JWT сотрудника; возвращает корутину"""
+        headers["Authorization"] = f"Bearer {AccessToken.for_user(self.employee)}"
+        return self.async_client.get(url, data, headers=headers)
+
+    def assertQueryBudget(self, url, budget, data=None):
+        """GET-запрос к url выполняется успешно и укладывается в budget запросов к базе"""
+        with self.assertMaxQueries(budget):
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
 
 class EmployeeViewTests(BaseEmployeeTests):
     """Тесты для сотрудников"""
@@ -81,6 +139,34 @@ class EmployeeViewTests(BaseEmployeeTests):
         self.assertEqual(len(employee_with_tasks.get("task_set")), busy_employer_count_tasks)
         self.assertEqual(employee_with_tasks.get("active_tasks_count"), busy_employer_count_tasks)
 
+    def test__busy_employers_only_active_tasks(self):
+        """Тест: в списке занятых сотрудников выводятся только задачи в работе"""
+        active_task = TaskFactory(employee=self.employee, status="in_progress")
+        TaskFactory(employee=self.employee, status="completed")
+        TaskFactory(employee=self.employee, status="canceled")
+        response = self.client.get(reverse("employee_tasks:employee-busy"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task_set = response.data["results"][0]["task_set"]
+        self.assertListEqual([task["id"] for task in task_set], [active_task.pk])
+
+    def test__busy_employers_num_queries(self):
+        """Тест: количество запросов не зависит от числа сотрудников на странице"""
+        for employee in EmployeeFactory.create_batch(5):
+            TaskFactory.create_batch(2, employee=employee, status="in_progress")
+
+        # Версия данных для ETag, count для пагинации, сотрудники, задачи в работе
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("employee_tasks:employee-busy"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for employee in EmployeeFactory.create_batch(10):
+            TaskFactory.create_batch(2, employee=employee, status="in_progress")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("employee_tasks:employee-busy"))
+        self.assertEqual(len(response.data["results"]), 16)
+
 
 class TaskViewTests(BaseEmployeeTests):
     def test__get_tasks_list(self):
@@ -159,3 +245,1633 @@ class TaskViewTests(BaseEmployeeTests):
 
         task_from_bd = Task.objects.get(pk=task.pk)
         self.assertEqual(task_from_bd.title_task, "test_title")
+
+
+class TaskBulkTests(BaseEmployeeTests):
+    """Тесты для массовых операций с задачами"""
+
+    def task_data(self, number, **extra):
+        return {
+            "title_task": f"task {number}",
+            "task_description": "description",
+            "employee": self.employee.pk,
+            **extra,
+        }
+
+    def test__bulk_create(self):
+        """Тест: массовое создание с ошибками по строкам"""
+        parent = TaskFactory(employee=self.employee, status="completed")
+        data = [self.task_data(i, status="in_progress", parent_task=parent.pk) for i in range(3)]
+        data.insert(1, {"title_task": "invalid"})
+
+        response = self.client.post(reverse("employee_tasks:task-bulk"), data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertListEqual([item["index"] for item in response.data["results"]], [0, 2, 3])
+        self.assertListEqual([item["index"] for item in response.data["errors"]], [1])
+        self.assertIn("task_description", response.data["errors"][0]["errors"])
+
+        created = Task.objects.filter(id__in=[item["id"] for item in response.data["results"]])
+        self.assertEqual(created.filter(parent_task=parent).count(), 3)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_tasks_count, 3)
+
+    def test__bulk_create_num_queries(self):
+        """Тест: количество запросов не зависит от количества задач в порции"""
+        url = reverse("employee_tasks:task-bulk")
+        # savepoint, сотрудники, вставка, освобождение savepoint
+        with self.assertNumQueries(4):
+            self.client.post(url, data=[self.task_data(i) for i in range(5)], format="json")
+        with self.assertNumQueries(4):
+            self.client.post(url, data=[self.task_data(i) for i in range(50)], format="json")
+        self.assertEqual(Task.objects.count(), 55)
+
+    def test__bulk_update(self):
+        """Тест: массовое изменение задач"""
+        tasks = TaskFactory.create_batch(3, employee=self.employee, status="pending")
+        data = [self.task_data(i, id=task.pk, status="in_progress") for i, task in enumerate(tasks)]
+        data.append(self.task_data(3, id=0))
+
+        response = self.client.put(reverse("employee_tasks:task-bulk"), data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+
+        for i, task in enumerate(tasks):
+            updated_task = Task.objects.get(pk=task.pk)
+            self.assertEqual(updated_task.title_task, f"task {i}")
+            self.assertGreater(updated_task.updated_at, task.updated_at)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_tasks_count, 3)
+
+    def test__bulk_status(self):
+        """Тест: массовая смена статуса"""
+        tasks = TaskFactory.create_batch(3, employee=self.employee, status="in_progress")
+        ids = [task.pk for task in tasks] + [0]
+
+        response = self.client.post(
+            reverse("employee_tasks:task-bulk-status"), data={"ids": ids, "status": "completed"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertListEqual(response.data["not_found"], [0])
+
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_tasks_count, 0)
+        self.assertEqual(self.employee.completed_tasks_count, 3)
+
+    def test__bulk_invalid_payload(self):
+        """Тест: массовые операции принимают только список задач"""
+        response = self.client.post(reverse("employee_tasks:task-bulk"), data={}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ResponseCacheTests(BaseEmployeeTests):
+    """Тесты для кеша ответов списков"""
+
+    def test__busy_cached_until_tasks_change(self):
+        """Тест: повторный запрос берётся из кеша, изменение задачи сбрасывает кеш"""
+        task = TaskFactory(employee=self.employee, status="in_progress")
+        url = reverse("employee_tasks:employee-busy")
+        stats = response_cache_stats()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        # Только версия данных, сами данные берутся из кеша
+        with self.assertNumQueries(1):
+            cached = self.client.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(self.client.get(url, {"page_size": 5})["X-Cache"], "MISS")
+
+        self.assertEqual(response_cache_stats()["hits"], stats["hits"] + 1)
+        self.assertEqual(response_cache_stats()["misses"], stats["misses"] + 2)
+
+        task.status = "completed"
+        task.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["active_tasks_count"], 0)
+
+    def test__important_invalidated_by_bulk_status(self):
+        """Тест: массовая смена статуса без сигналов тоже сбрасывает кеш"""
+        parent = TaskFactory(employee=self.employee, status="in_progress")
+        task = TaskFactory(employee=self.employee, status="pending", parent_task=parent)
+        url = reverse("employee_tasks:task-important")
+        self.assertEqual(self.client.get(url).data["count"], 1)
+
+        response = self.client.post(
+            reverse("employee_tasks:task-bulk-status"), {"ids": [task.pk], "status": "completed"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 0)
+
+    def test__invalidated_by_writes_without_signals(self):
+        """Тест: запись в обход сигналов (QuerySet.update, другой процесс, загрузка) тоже меняет ключ кеша и ETag"""
+        task = TaskFactory(employee=self.employee, status="in_progress")
+        url = reverse("employee_tasks:employee-busy")
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        Task.objects.filter(pk=task.pk).update(status="completed")
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertEqual(modified["X-Cache"], "MISS")
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+        self.assertEqual(modified.data["results"][0]["active_tasks_count"], 0)
+
+    def test__task_list_not_cached(self):
+        """Тест: списки не из cached_actions не кешируются"""
+        response = self.client.get(reverse("employee_tasks:task-list"))
+        self.assertNotIn("X-Cache", response)
+
+
+class ConditionalGetTests(BaseEmployeeTests):
+    """Тесты для условных GET (ETag и Last-Modified)"""
+
+    def test__task_list_not_modified(self):
+        """Тест: на совпадающий ETag список отвечает 304 одним запросом, изменение задачи меняет ETag"""
+        task = TaskFactory(employee=self.employee, status="pending")
+        url = reverse("employee_tasks:task-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+        self.assertNotEqual(self.client.get(url, {"page_size": 5})["ETag"], response["ETag"])
+
+        task.status = "in_progress"
+        task.save()
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+
+    def test__task_list_changes_on_delete(self):
+        """Тест: удаление задачи меняет ETag списка; без Last-Modified If-Modified-Since не даёт 304"""
+        tasks = TaskFactory.create_batch(3, employee=self.employee)
+        url = reverse("employee_tasks:task-list")
+        etag = self.client.get(url)["ETag"]
+
+        tasks[0].delete()
+        for headers in ({"HTTP_IF_NONE_MATCH": etag}, {"HTTP_IF_MODIFIED_SINCE": http_date(time.time() + 60)}):
+            with self.subTest(headers=headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["count"], 2)
+
+    def test__task_retrieve_if_modified_since(self):
+        """Тест: задача не изменилась после Last-Modified - ответ 304"""
+        task = TaskFactory(employee=self.employee)
+        url = reverse("employee_tasks:task-detail", args=[task.pk])
+        response = self.client.get(url)
+
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test__retrieve_invalid_pk(self):
+        """Тест: ключ неверного типа в адресе - ответ 404, а не ошибка сервера"""
+        for name in ("employee_tasks:task-detail", "employee_tasks:employee-detail"):
+            url = reverse(name, args=["abc"])
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test__subtask_etag_changes_on_parent_delete(self):
+        """Тест: удаление родительской задачи меняет ETag подзадачи"""
+        parent = TaskFactory(employee=self.employee)
+        child = TaskFactory(employee=self.employee, parent_task=parent)
+        Task.objects.filter(pk=child.pk).update(updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        url = reverse("employee_tasks:task-detail", args=[child.pk])
+        etag = self.client.get(url)["ETag"]
+
+        parent.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["parent_task"])
+
+    def test__important_etag_changes_on_parent_status(self):
+        """Тест: изменение статуса родительской задачи меняет ETag важных задач, хотя сами подзадачи не менялись"""
+        parents = [TaskFactory(employee=self.employee, status=status) for status in ("in_progress", "pending")]
+        children = [TaskFactory(employee=None, status="pending", parent_task=parent) for parent in parents]
+        url = reverse("employee_tasks:task-important")
+        response = self.client.get(url)
+        self.assertListEqual([task["id"] for task in response.data["results"]], [children[0].pk])
+
+        parents[0].status, parents[1].status = "completed", "in_progress"
+        for parent in parents:
+            parent.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual([task["id"] for task in response.data["results"]], [children[1].pk])
+
+    def test__busy_etag_changes_on_task_delete(self):
+        """Тест: ETag занятых сотрудников меняется при удалении задачи"""
+        tasks = TaskFactory.create_batch(2, employee=self.employee, status="in_progress")
+        url = reverse("employee_tasks:employee-busy")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Task.objects.filter(pk=tasks[0].pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["active_tasks_count"], 1)
+
+
+@override_settings(TASK_SYNC_LAG=0)
+class TaskChangesTests(BaseEmployeeTests):
+    """Тесты для синхронизации изменений задач"""
+
+    url = reverse("employee_tasks:task-changes")
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test__sync_changes_and_deletions(self):
+        """Тест: первая синхронизация отдаёт все задачи по страницам, следующие - только изменения и удаления"""
+        tasks = TaskFactory.create_batch(5, employee=self.employee, status="pending")
+
+        synced, since, has_more = [], None, True
+        while has_more:
+            data = self.sync(since, page_size=2)
+            synced += [task["id"] for task in data["results"]]
+            since, has_more = data["since"], data["has_more"]
+        self.assertListEqual(sorted(synced), sorted(task.pk for task in tasks))
+
+        data = self.sync(since)
+        self.assertListEqual(data["results"], [])
+        self.assertListEqual(data["deleted"], [])
+
+        tasks[1].status = "completed"
+        tasks[1].save()
+        created = TaskFactory(employee=self.employee)
+        deleted_id = tasks[2].pk
+        response = self.client.delete(reverse("employee_tasks:task-detail", args=[deleted_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        data = self.sync(since)
+        self.assertListEqual([task["id"] for task in data["results"]], [tasks[1].pk, created.pk])
+        self.assertEqual(data["results"][0]["status"], "completed")
+        self.assertListEqual(data["deleted"], [deleted_id])
+        self.assertFalse(data["has_more"])
+
+        data = self.sync(data["since"])
+        self.assertListEqual(data["results"], [])
+        self.assertListEqual(data["deleted"], [])
+
+    def test__first_sync_skips_old_deletions(self):
+        """Тест: удаления до первой синхронизации не отдаются"""
+        TaskFactory(employee=self.employee).delete()
+        data = self.sync()
+        self.assertListEqual(data["deleted"], [])
+
+    @override_settings(TASK_SYNC_LAG=60)
+    def test__recent_changes_held_back(self):
+        """Тест: изменения моложе TASK_SYNC_LAG отдаются только при следующих синхронизациях"""
+        TaskFactory(employee=self.employee)
+        self.assertListEqual(self.sync()["results"], [])
+
+    def test__invalid_token(self):
+        """Тест: неверный токен - ошибка 400"""
+        response = self.client.get(self.url, {"since": "not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+
+class TaskEventsTests(BaseEmployeeTests):
+    """Тесты для потока событий задач"""
+
+    @staticmethod
+    def parse(message):
+        event, data = message.decode().strip().split("\n")
+        return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    def test__stream_task_and_workload_events(self):
+        """Тест: создание задачи приходит событиями task и workload после фиксации транзакции"""
+
+        def create_task():
+            with self.captureOnCommitCallbacks(execute=True):
+                return TaskFactory(employee=self.employee, status="in_progress")
+
+        async def read_events():
+            response = await self.async_get(reverse("employee_tasks:task-events"), Accept="text/event-stream")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response["Content-Type"].startswith("text/event-stream"))
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b": connected\n\n")
+            task = await sync_to_async(create_task)()
+            events = [self.parse(await anext(stream)) for _ in range(2)]
+            await stream.aclose()
+            return task, events
+
+        task, events = async_to_sync(read_events)()
+        (task_event, task_data), (workload_event, workload_data) = events
+        self.assertEqual(task_event, "task")
+        self.assertEqual(task_data["action"], "created")
+        self.assertEqual(task_data["task"]["id"], task.pk)
+        self.assertEqual(workload_event, "workload")
+        self.assertDictEqual(workload_data, {"employee": self.employee.pk, "deltas": {"active_tasks_count": 1}})
+        self.assertSetEqual(broker.subscriptions, set())
+
+    def test__events_unavailable_under_wsgi(self):
+        """Тест: под WSGI поток событий сразу отвечает 501, а не занимает поток сервера без событий"""
+        response = self.client.get(reverse("employee_tasks:task-events"), HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(response.streaming)
+        event, data = self.parse(response.content)
+        self.assertEqual(event, "error")
+        self.assertIn("APP_SERVER=asgi", data["detail"])
+        self.assertSetEqual(broker.subscriptions, set())
+
+    @override_settings(TASK_EVENTS_QUEUE_SIZE=2)
+    def test__slow_subscriber_gets_reset(self):
+        """Тест: при переполнении очереди подключения накопленные события заменяются на reset"""
+
+        async def overflow():
+            subscription = broker.subscribe()
+            try:
+                for number in range(3):
+                    subscription.push(f"event {number}")
+                return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            finally:
+                broker.unsubscribe(subscription)
+
+        self.assertListEqual(async_to_sync(overflow)(), [RESET_MESSAGE])
+
+    def test__workload_deltas(self):
+        """Тест: изменения счётчиков при смене статуса и сотрудника задачи"""
+        self.assertDictEqual(
+            workload_deltas(("pending", 1), ("in_progress", 1)),
+            {1: {"pending_tasks_count": -1, "active_tasks_count": 1}},
+        )
+        self.assertDictEqual(
+            workload_deltas(("pending", 1), ("pending", 2)),
+            {1: {"pending_tasks_count": -1}, 2: {"pending_tasks_count": 1}},
+        )
+        self.assertDictEqual(workload_deltas(("pending", 1), ("pending", 1)), {})
+
+
+class AuthenticationCacheTests(APITestCase):
+    """Тесты для кеша аутентификации"""
+
+    password = "Secret-password-1"
+
+    def setUp(self):
+        self.employee = EmployeeFactory()
+        self.employee.set_password(self.password)
+        self.employee.save()
+        self.url = reverse("employee_tasks:employee-detail", args=[self.employee.pk])
+
+    def basic_auth(self, password=None):
+        credentials = f"{self.employee.email}:{password or self.password}".encode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {base64.b64encode(credentials).decode()}")
+
+    def test__basic_auth_checks_password_once(self):
+        """Тест: пароль Basic-аутентификации проверяется только при первом запросе"""
+        self.basic_auth()
+        check_password = Employee.check_password
+        with mock.patch.object(Employee, "check_password", autospec=True, side_effect=check_password) as check:
+            for _ in range(3):
+                self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertEqual(check.call_count, 1)
+
+    def test__basic_auth_wrong_password_is_not_cached(self):
+        """Тест: неверный пароль отклоняется и после успешного входа"""
+        self.basic_auth()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.basic_auth("wrong-password")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test__basic_auth_password_change(self):
+        """Тест: после смены пароля старый пароль перестаёт действовать"""
+        self.basic_auth()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        self.employee.set_password("New-secret-password-2")
+        self.employee.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.basic_auth("New-secret-password-2")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test__changes_from_other_processes(self):
+        """Тест: изменения без сброса кеша в этом процессе (другой процесс со своим кешем) действуют сразу"""
+        self.basic_auth()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.employee)}")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        # queryset.update не отправляет сигналов, как и сохранение сотрудника в другом процессе
+        Employee.objects.filter(pk=self.employee.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.basic_auth()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        Employee.objects.filter(pk=self.employee.pk).update(is_active=True, password=make_password("Other-password-3"))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test__basic_auth_inactive_and_deleted(self):
+        """Тест: деактивированный и удалённый сотрудник не проходят аутентификацию"""
+        self.basic_auth()
+        url = reverse("employee_tasks:employee-list")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.employee.is_active = False
+        self.employee.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.employee.is_active = True
+        self.employee.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.employee.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test__jwt_user_is_not_cached(self):
+        """Тест: JWT загружает сотрудника из базы одним запросом на каждый запрос, деактивация действует сразу"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.employee)}")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        # сотрудник из токена и сам запрос представления
+        self.assertEqual(len(queries), 2)
+        self.assertIn('WHERE "employee_tasks_employee"."id" =', queries[0]["sql"])
+
+        self.employee.is_active = False
+        self.employee.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+REPLICA = "replica_test"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(BaseEmployeeTests):
+    """Тесты для чтения с реплики.
+
+    Реплика - отдельное соединение с той же тестовой базой: оно не видит данных, созданных в транзакции теста,
+    как реплика, до которой изменения ещё не дошли.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Соединение создаётся напрямую, а не через settings.DATABASES, поэтому тест может им пользоваться
+        primary = connections[DEFAULT_DB_ALIAS]
+        connections[REPLICA] = type(primary)(dict(primary.settings_dict), alias=REPLICA)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        super().tearDownClass()
+
+    def test__list_reads_from_replica(self):
+        """Тест: список задач читается с реплики, которая ещё не получила новую задачу"""
+        TaskFactory(employee=self.employee, status="pending")
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            response = self.client.get(reverse("employee_tasks:task-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data["results"], [])
+        self.assertTrue(queries.captured_queries)
+
+    def test__read_your_writes(self):
+        """Тест: после изменяющего запроса сотрудник читает с основной базы и видит свои изменения"""
+        data = {"title_task": "Новая задача", "task_description": "Описание", "status": "pending"}
+        response = self.client.post(reverse("employee_tasks:task-list"), data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            response = self.client.get(reverse("employee_tasks:task-list"))
+        self.assertEqual([task["id"] for task in response.data["results"]], [Task.objects.get().pk])
+        self.assertListEqual(queries.captured_queries, [])
+        self.assertTrue(caches[REPLICA_PIN_CACHE_ALIAS].get(pinned_key(self.employee)))
+
+        # Другой сотрудник по-прежнему читает с реплики
+        self.client.force_authenticate(user=EmployeeFactory())
+        response = self.client.get(reverse("employee_tasks:task-list"))
+        self.assertListEqual(response.data["results"], [])
+
+    def test__other_actions_use_primary(self):
+        """Тест: действия не из replica_actions читают с основной базы"""
+        task = TaskFactory(employee=self.employee, status="pending")
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            response = self.client.get(reverse("employee_tasks:task-tree", args=[task.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], task.pk)
+        self.assertListEqual(queries.captured_queries, [])
+
+    def test__replica_response_cached_by_replica_version(self):
+        """Тест: ответ с реплики кешируется под версией данных реплики, а не основной базы"""
+        url = reverse("employee_tasks:employee-list")
+        EmployeeFactory()
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        cached = self.client.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertNotIn(self.employee.pk, [employee["id"] for employee in cached.data["results"]])
+
+        # Основная база видит новых сотрудников и другую версию данных
+        data = {"title_task": "Новая задача", "task_description": "Описание", "status": "pending"}
+        response = self.client.post(reverse("employee_tasks:task-list"), data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn(self.employee.pk, [employee["id"] for employee in response.data["results"]])
+
+    def test__pin_cache_must_be_shared(self):
+        """Тест: с репликами кеш закреплений, локальный для процесса, не проходит проверку настроек"""
+        self.assertListEqual([error.id for error in check_replica_pin_cache(None)], ["employee_tasks.E001"])
+
+        shared = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "replica_pins"}
+        with self.settings(CACHES={**settings.CACHES, REPLICA_PIN_CACHE_ALIAS: shared}):
+            self.assertListEqual(check_replica_pin_cache(None), [])
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertListEqual(check_replica_pin_cache(None), [])
+
+    def test__router(self):
+        """Тест: запись и миграции только в основную базу"""
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_write(Task), DEFAULT_DB_ALIAS)
+        self.assertIsNone(router.db_for_read(Task))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "employee_tasks"))
+        self.assertFalse(router.allow_migrate(REPLICA, "employee_tasks"))
+
+
+# Бюджеты запросов к базе на страницу списка: не зависят от количества строк на странице
+QUERY_BUDGETS = {
+    # Версия данных для кеша, страница (с подсчётом просроченных задач подзапросом) и COUNT
+    "employee_tasks:employee-list": 3,
+    # Версия данных для ETag и кеша, COUNT, страница и задачи в работе одним prefetch
+    "employee_tasks:employee-busy": 4,
+    # Версия данных для ETag, COUNT и страница
+    "employee_tasks:task-list": 3,
+    "employee_tasks:task-important": 3,
+    # Курсорная пагинация без COUNT: страница и, если её не хватило, следующий сегмент
+    "employee_tasks:task-overdue": 2,
+}
+
+
+class QueryBudgetTests(BaseEmployeeTests):
+    """Тесты: количество запросов к базе на страницу не растёт с количеством строк (нет N+1)"""
+
+    def test__query_budgets(self):
+        """Тест: списки укладываются в бюджет запросов и с одной строкой, и с полной страницей"""
+        for batch in (1, 20):
+            employees = EmployeeFactory.create_batch(batch)
+            parent = TaskFactory(employee=employees[0], status="in_progress")
+            deadline = parent.deadline - timedelta(days=1)
+            for employee in employees:
+                TaskFactory(employee=employee, status="pending", parent_task=parent, deadline=deadline)
+            for name, budget in QUERY_BUDGETS.items():
+                with self.subTest(name, batch=batch):
+                    self.assertQueryBudget(reverse(name), budget)
+
+        with self.subTest("employee_tasks:employee-list?task_id"):
+            # Версия данных, задачи, сотрудники-кандидаты для рекомендаций, COUNT и страница
+            self.assertQueryBudget(reverse("employee_tasks:employee-list"), 5, {"task_id": parent.pk})
+
+
+class InstrumentationTests(BaseEmployeeTests):
+    """Тесты для профилирования запросов"""
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1)
+    def test__server_timing(self):
+        """Тест: заголовок Server-Timing и запись в журнал с запросами к базе и временем сериализации"""
+        TaskFactory.create_batch(3, employee=self.employee, status="in_progress")
+        with self.assertLogs("employee_tasks.profiling", "INFO") as logs:
+            response = self.client.get(reverse("employee_tasks:employee-busy"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+        profile = json.loads(logs.records[0].getMessage())
+        self.assertEqual(profile["view"], "EmployeeViewSet.busy")
+        self.assertEqual(profile["status"], 200)
+        self.assertGreater(profile["queries"], 0)
+        self.assertIn(f'desc="{profile["queries"]} queries"', response["Server-Timing"])
+        self.assertGreater(profile["serializer_ms"], 0)
+        self.assertLessEqual(len(profile["slowest"]), 3)
+        self.assertGreaterEqual(profile["slowest"][0]["ms"], profile["slowest"][-1]["ms"])
+
+    def test__sampling_disabled(self):
+        """Тест: по умолчанию запросы не профилируются"""
+        response = self.client.get(reverse("employee_tasks:employee-busy"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class SparseFieldsetTests(BaseEmployeeTests):
+    """Тесты для параметров fields= и exclude= и быстрого пути списков задач"""
+
+    def test__fields(self):
+        """Тест: список задач только с запрошенными полями, описание не читается из базы"""
+        TaskFactory.create_batch(3, employee=self.employee)
+        with self.assertMaxQueries(QUERY_BUDGETS["employee_tasks:task-list"]) as queries:
+            response = self.client.get(reverse("employee_tasks:task-list"), {"fields": "status,id,employee"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        for task in response.data["results"]:
+            # Поля идут в порядке сериализатора, а не параметра
+            self.assertEqual(list(task), ["id", "status", "employee"])
+            self.assertEqual(task["employee"], self.employee.pk)
+        self.assertFalse(any("task_description" in sql for sql in queries.statements))
+
+    def test__exclude(self):
+        """Тест: задача без исключённых полей, они не читаются из базы"""
+        task = TaskFactory()
+        url = reverse("employee_tasks:task-detail", args=[task.pk])
+        with self.assertMaxQueries(2) as queries:
+            response = self.client.get(url, {"exclude": "task_description,deadline"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], task.pk)
+        self.assertNotIn("task_description", response.data)
+        self.assertNotIn("deadline", response.data)
+        self.assertFalse(any("task_description" in sql for sql in queries.statements))
+
+    def test__invalid_fields(self):
+        """Тест: неизвестные поля и пустой набор полей - ошибка 400"""
+        url = reverse("employee_tasks:task-list")
+        for params in ({"fields": "id,password"}, {"fields": ""}, {"fields": "id", "exclude": "id"}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test__values_fast_path(self):
+        """Тест: быстрый путь списков отдаёт то же, что сериализатор моделей, в том числе с курсором"""
+        parent = TaskFactory(employee=self.employee, status="in_progress")
+        TaskFactory.create_batch(2, employee=self.employee, parent_task=parent, status="pending")
+        TaskFactory(employee=None, deadline=None)
+        expected = TaskSerializer(Task.objects.order_by("employee_id", "title_task", "id"), many=True).data
+
+        response = self.client.get(reverse("employee_tasks:task-list"))
+        self.assertEqual(response.data["results"], expected)
+        response = self.client.get(reverse("employee_tasks:task-list"), {"cursor": "", "page_size": 2})
+        self.assertEqual(response.data["results"], expected[:2])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"], expected[2:])
+
+    def test__json_renderer(self):
+        """Тест: ответ orjson совпадает с JSONRenderer, время в UTC с суффиксом Z"""
+        data = {"deadline": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "date": date(2024, 1, 2), "name": "Ё"}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(json.loads(ORJSONRenderer().render(data))["deadline"], "2024-01-02T03:04:05Z")
+        indented = "application/json; indent=2"
+        self.assertEqual(ORJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
+
+
+class CompressionTests(BaseEmployeeTests):
+    """Тесты для сжатия ответов"""
+
+    decompress = {
+        "gzip": gzip.decompress,
+        "br": brotli.decompress,
+        "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+    }
+
+    def test__choose_codec(self):
+        """Тест: кодировка с наибольшим весом q, при равных весах - по предпочтению сервера"""
+        codecs = get_codecs()
+        cases = {
+            "gzip, deflate, br, zstd": "zstd",
+            "gzip;q=1, br;q=0.8": "gzip",
+            "br, zstd;q=0": "br",
+            "*;q=0.5, gzip": "gzip",
+            "*": "zstd",
+            "identity": None,
+            "": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                codec = choose_codec(codecs, header)
+                self.assertEqual(codec and codec.name, expected)
+
+    def test__compressed_list(self):
+        """Тест: список сжимается выбранной кодировкой, ETag слабый, условный GET работает"""
+        TaskFactory.create_batch(20, employee=self.employee)
+        url = reverse("employee_tasks:task-list")
+        plain = self.client.get(url)
+        self.assertNotIn("Content-Encoding", plain)
+
+        for encoding, decompress in self.decompress.items():
+            with self.subTest(encoding=encoding):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertLess(len(response.content), len(plain.content))
+                self.assertEqual(int(response["Content-Length"]), len(response.content))
+                self.assertEqual(decompress(response.content), plain.content)
+                self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+
+                not_modified = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test__small_response(self):
+        """Тест: ответ меньше RESPONSE_COMPRESSION_MIN_SIZE не сжимается"""
+        task = TaskFactory()
+        response = self.client.get(reverse("employee_tasks:task-detail", args=[task.pk]), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    @override_settings(RESPONSE_COMPRESSION_ENCODINGS=[])
+    def test__compression_disabled(self):
+        """Тест: без кодировок в настройках ответы не сжимаются"""
+        TaskFactory.create_batch(20, employee=self.employee)
+        response = self.client.get(reverse("employee_tasks:task-list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    @mock.patch("employee_tasks.renderers.STREAM_BATCH_SIZE", 5)
+    def test__compressed_export(self):
+        """Тест: потоковая выгрузка сжимается по частям и распаковывается в то же содержимое"""
+        TaskFactory.create_batch(20, employee=self.employee)
+        url = reverse("employee_tasks:task-export")
+        plain = b"".join(self.client.get(url).streaming_content)
+
+        for encoding, decompress in self.decompress.items():
+            with self.subTest(encoding=encoding):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertFalse(response.has_header("Content-Length"))
+                chunks = list(response.streaming_content)
+                self.assertGreater(len(chunks), 2)
+                self.assertEqual(decompress(b"".join(chunks)), plain)
+
+
+class TaskDeadlineTests(BaseEmployeeTests):
+    """Тесты для просроченных задач и задач с близким сроком"""
+
+    def test__overdue(self):
+        """Тест: просроченные незавершённые задачи по сроку, курсор не теряет точность времени"""
+        now = datetime.now(timezone.utc)
+        # Сроки различаются меньше чем на миллисекунду
+        first = TaskFactory(employee=self.employee, status="pending", deadline=now - timedelta(days=1))
+        second = TaskFactory(
+            employee=self.employee, status="in_progress", deadline=first.deadline + timedelta(microseconds=10)
+        )
+        TaskFactory(employee=self.employee, status="completed", deadline=now - timedelta(days=2))
+        TaskFactory(employee=self.employee, status="pending", deadline=now + timedelta(days=1))
+        TaskFactory(employee=self.employee, status="pending", deadline=None)
+
+        url = reverse("employee_tasks:task-overdue")
+        ids = []
+        response = self.client.get(url, {"page_size": 1})
+        for _ in range(3):
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [task["id"] for task in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertListEqual(ids, [first.id, second.id])
+
+    def test__due_soon(self):
+        """Тест: задачи со сроком в ближайшие within"""
+        now = datetime.now(timezone.utc)
+        soon = TaskFactory(employee=self.employee, status="pending", deadline=now + timedelta(hours=47))
+        sooner = TaskFactory(employee=self.employee, status="in_progress", deadline=now + timedelta(hours=1))
+        TaskFactory(employee=self.employee, status="pending", deadline=now + timedelta(hours=49))
+        TaskFactory(employee=self.employee, status="completed", deadline=now + timedelta(hours=2))
+        TaskFactory(employee=self.employee, status="pending", deadline=now - timedelta(hours=1))
+
+        url = reverse("employee_tasks:task-due-soon")
+        response = self.client.get(url, {"within": "48h"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual([task["id"] for task in response.data["results"]], [sooner.id, soon.id])
+
+        response = self.client.get(url)
+        self.assertListEqual([task["id"] for task in response.data["results"]], [sooner.id])
+
+        for within in ("48", "2y", "0h", "100d"):
+            response = self.client.get(url, {"within": within})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test__employee_overdue_count(self):
+        """Тест: количество просроченных задач в списке сотрудников"""
+        past = datetime.now(timezone.utc) - timedelta(days=1)
+        TaskFactory.create_batch(2, employee=self.employee, status="pending", deadline=past)
+        TaskFactory(employee=self.employee, status="canceled", deadline=past)
+
+        response = self.client.get(reverse("employee_tasks:employee-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {employee["id"]: employee["overdue_tasks_count"] for employee in response.data["results"]}
+        self.assertEqual(counts[self.employee.pk], 2)
+
+
+class SearchTests(BaseEmployeeTests):
+    """Тесты для полнотекстового поиска задач и сотрудников"""
+
+    def test__search_tasks(self):
+        """Тест: задачи находятся по словоформам, совпадение в названии выше совпадения в описании"""
+        in_description = TaskFactory(
+            employee=self.employee, title_task="Обновить сервер", task_description="Отчёт для отдела продаж"
+        )
+        in_title = TaskFactory(
+            employee=self.employee, title_task="Подготовить отчёты", task_description="Квартальные данные"
+        )
+        TaskFactory(employee=self.employee, title_task="Обновить сервер", task_description="Резервная копия")
+
+        url = reverse("employee_tasks:task-list")
+        response = self.client.get(url, {"search": "отчёт"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertListEqual([task["id"] for task in response.data["results"]], [in_title.id, in_description.id])
+        self.assertNotIn("search_vector", response.data["results"][0])
+
+        response = self.client.get(url, {"search": "сервер -копия"})
+        self.assertListEqual([task["id"] for task in response.data["results"]], [in_description.id])
+
+    def test__search_tasks_after_update(self):
+        """Тест: поисковый вектор пересчитывается при изменении задачи"""
+        task = TaskFactory(employee=self.employee, title_task="Собрать требования", task_description="")
+        url = reverse("employee_tasks:task-list")
+
+        Task.objects.filter(pk=task.pk).update(title_task="Проверить договор")
+        self.assertEqual(self.client.get(url, {"search": "требования"}).data["count"], 0)
+        self.assertEqual(self.client.get(url, {"search": "договоры"}).data["count"], 1)
+
+    @override_settings(SEARCH_RANK_LIMIT=2)
+    def test__search_rank_limit(self):
+        """Тест: ранжируются не больше SEARCH_RANK_LIMIT найденных задач"""
+        TaskFactory.create_batch(3, employee=self.employee, title_task="Созвон с заказчиком")
+        response = self.client.get(reverse("employee_tasks:task-list"), {"search": "созвон"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test__search_employees(self):
+        """Тест: сотрудники находятся по началу фамилии, имени и должности"""
+        analyst = EmployeeFactory(first_name="Мария", last_name="Иванова", position="Аналитик")
+        EmployeeFactory(first_name="Иван", last_name="Петров", position="Разработчик")
+
+        url = reverse("employee_tasks:employee-list")
+        response = self.client.get(url, {"search": "иван"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+        response = self.client.get(url, {"search": "ива анал"})
+        self.assertListEqual([employee["id"] for employee in response.data["results"]], [analyst.id])
+
+        response = self.client.get(url, {"search": "!:*&|"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 0)
+
+
+class WorkloadSnapshotTests(BaseEmployeeTests):
+    """Тесты для снимков и истории загруженности сотрудников"""
+
+    def test__snapshot_workload(self):
+        """Тест: снимок содержит счётчики по статусам и просроченные задачи, повторный запуск обновляет его"""
+        past = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        TaskFactory(employee=self.employee, status="pending", deadline=past)
+        TaskFactory(employee=self.employee, status="in_progress", deadline=past)
+        TaskFactory(employee=self.employee, status="in_progress", deadline=None)
+        TaskFactory(employee=self.employee, status="completed", deadline=past)
+        other = EmployeeFactory()
+
+        out = StringIO()
+        call_command("snapshot_workload", stdout=out)
+        self.assertIn("сотрудников 2", out.getvalue())
+
+        snapshot = WorkloadSnapshot.objects.get(employee=self.employee)
+        self.assertEqual(snapshot.pending_tasks_count, 1)
+        self.assertEqual(snapshot.active_tasks_count, 2)
+        self.assertEqual(snapshot.completed_tasks_count, 1)
+        self.assertEqual(snapshot.canceled_tasks_count, 0)
+        self.assertEqual(snapshot.overdue_tasks_count, 2)
+        self.assertEqual(WorkloadSnapshot.objects.get(employee=other).overdue_tasks_count, 0)
+
+        TaskFactory(employee=self.employee, status="pending", deadline=past)
+        call_command("snapshot_workload", stdout=StringIO())
+        snapshot = WorkloadSnapshot.objects.get(employee=self.employee)
+        self.assertEqual(snapshot.pending_tasks_count, 2)
+        self.assertEqual(snapshot.overdue_tasks_count, 3)
+
+    def test__workload_history(self):
+        """Тест: история загруженности сотрудника за период"""
+        today = date(2024, 3, 31)
+        WorkloadSnapshot.objects.bulk_create(
+            WorkloadSnapshot(
+                employee=self.employee,
+                date=today - timedelta(days=days),
+                pending_tasks_count=days,
+                active_tasks_count=0,
+                completed_tasks_count=0,
+                canceled_tasks_count=0,
+                overdue_tasks_count=0,
+                created_at=datetime(2024, 3, 31, tzinfo=timezone.utc),
+            )
+            for days in range(10)
+        )
+        url = reverse("employee_tasks:employee-workload-history", args=[self.employee.pk])
+
+        response = self.client.get(url, {"date_from": "2024-03-25", "date_to": "2024-03-27"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["employee"], self.employee.pk)
+        results = response.data["results"]
+        self.assertListEqual([row["date"] for row in results], ["2024-03-25", "2024-03-26", "2024-03-27"])
+        self.assertListEqual([row["pending_tasks_count"] for row in results], [6, 5, 4])
+
+        response = self.client.get(url, {"date_from": "2024-03-28", "date_to": "2024-03-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"date_to": "31.03.2024"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"date_from": "2020-01-01", "date_to": "2024-03-31"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("employee_tasks:employee-workload-history", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportTests(BaseEmployeeTests):
+    """Тесты для потоковой выгрузки задач и загруженности сотрудников"""
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test__export_tasks_ndjson(self):
+        """Тест: выгрузка задач в NDJSON по умолчанию"""
+        parent = TaskFactory(employee=self.employee, status="in_progress")
+        child = TaskFactory(employee=self.employee, status="pending", parent_task=parent)
+
+        response = self.client.get(reverse("employee_tasks:task-export"))
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertIn('filename="tasks.ndjson"', response["Content-Disposition"])
+
+        rows = {row["id"]: row for row in map(json.loads, self.read(response).splitlines())}
+        self.assertSetEqual(set(rows), {parent.pk, child.pk})
+        self.assertEqual(rows[child.pk]["parent_task"], parent.pk)
+        self.assertEqual(rows[child.pk]["employee"], self.employee.pk)
+        self.assertEqual(rows[child.pk]["status"], "pending")
+
+        detail = self.client.get(reverse("employee_tasks:task-detail", args=[child.pk]))
+        self.assertEqual(rows[child.pk]["created_at"], detail.data["created_at"])
+
+    def test__export_tasks_csv(self):
+        """Тест: выгрузка задач в CSV с заголовком"""
+        TaskFactory.create_batch(3, employee=self.employee, status="completed")
+
+        response = self.client.get(reverse("employee_tasks:task-export"), {"format": "csv"})
+        self.assertIn('filename="tasks.csv"', response["Content-Disposition"])
+
+        header, *rows = csv.reader(StringIO(self.read(response)))
+        self.assertEqual(header[0], "id")
+        self.assertIn("parent_task", header)
+        self.assertListEqual([int(row[0]) for row in rows], list(Task.objects.values_list("id", flat=True)))
+
+    def test__export_busy_employees(self):
+        """Тест: выгрузка загруженности сотрудников по убыванию количества задач в работе"""
+        busy = EmployeeFactory()
+        TaskFactory.create_batch(2, employee=busy, status="in_progress")
+        TaskFactory(employee=self.employee, status="pending")
+
+        response = self.client.get(reverse("employee_tasks:employee-busy-export"), {"format": "csv"})
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+
+        self.assertListEqual([int(row["id"]) for row in rows], [busy.pk, self.employee.pk])
+        self.assertEqual(rows[0]["active_tasks_count"], "2")
+        self.assertEqual(rows[1]["pending_tasks_count"], "1")
+
+    def test__export_under_asgi(self):
+        """Тест: под ASGI выгрузка - асинхронный поток порций строк, а не список, собранный в памяти"""
+        tasks = TaskFactory.create_batch(5, employee=self.employee)
+
+        async def read():
+            response = await self.async_get(reverse("employee_tasks:task-export"), {"format": "csv"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.is_async)
+            return [part async for part in response.streaming_content]
+
+        with mock.patch("employee_tasks.renderers.STREAM_BATCH_SIZE", 2):
+            parts = async_to_sync(read)()
+        # Заголовок и порции по 2, 2 и 1 строке
+        self.assertEqual(len(parts), 4)
+        header, *rows = csv.reader(StringIO(b"".join(parts).decode()))
+        self.assertEqual(header[0], "id")
+        self.assertListEqual(sorted(int(row[0]) for row in rows), sorted(task.pk for task in tasks))
+
+
+class TaskAssignmentTests(BaseEmployeeTests):
+    """Тесты для подбора исполнителей важных задач"""
+
+    def setUp(self):
+        super().setUp()
+        self.parent_owner = EmployeeFactory()
+        self.parent_task = TaskFactory(employee=self.parent_owner, status="in_progress")
+        TaskFactory.create_batch(2, employee=self.employee, status="in_progress")
+
+    def test__parent_owner_within_limit(self):
+        """Тест: задачу берёт исполнитель родительской задачи, если он загружен не более чем на 2 задачи больше"""
+        important_task = TaskFactory(employee=None, status="pending", parent_task=self.parent_task)
+        EmployeeFactory()
+
+        response = self.client.get(reverse("employee_tasks:task-important-assignments"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["task_id"], important_task.pk)
+        self.assertEqual(response.data[0]["task"], important_task.title_task)
+        self.assertListEqual(
+            response.data[0]["employees"], [f"{self.parent_owner.last_name} {self.parent_owner.first_name}"]
+        )
+
+    def test__least_loaded_employee(self):
+        """Тест: задачу берёт наименее загруженный сотрудник, если исполнитель родительской задачи перегружен"""
+        TaskFactory.create_batch(3, employee=self.parent_owner, status="in_progress")
+        free_employee = EmployeeFactory()
+        TaskFactory(employee=None, status="pending", parent_task=self.parent_task)
+
+        response = self.client.get(reverse("employee_tasks:task-important-assignments"))
+        self.assertListEqual(response.data[0]["employees"], [f"{free_employee.last_name} {free_employee.first_name}"])
+
+        response = self.client.get(reverse("employee_tasks:employee-list"), {"task_id": self.parent_task.pk})
+        self.assertListEqual([employee["id"] for employee in response.data["results"]], [free_employee.pk])
+
+    def test__assignments_spread_load(self):
+        """Тест: задачи одного набора распределяются с учётом уже сделанных рекомендаций"""
+        TaskFactory.create_batch(3, employee=self.parent_owner, status="in_progress")
+        free_employees = EmployeeFactory.create_batch(2)
+        TaskFactory.create_batch(4, employee=None, status="pending", parent_task=self.parent_task)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("employee_tasks:task-important-assignments"))
+
+        assigned = [employees[0] for employees in (item["employees"] for item in response.data)]
+        for employee in free_employees:
+            self.assertEqual(assigned.count(f"{employee.last_name} {employee.first_name}"), 2)
+
+    def test__invalid_task_id(self):
+        """Тест: task_id не из целых чисел - ошибка 400, а не 500"""
+        for task_id in ("1,x", "x", f"{self.parent_task.pk},1.5"):
+            with self.subTest(task_id=task_id):
+                response = self.client.get(reverse("employee_tasks:employee-list"), {"task_id": task_id})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("task_id", response.data)
+
+
+class TaskHierarchyTests(BaseEmployeeTests):
+    """Тесты для дерева задач и цепочки родительских задач"""
+
+    def setUp(self):
+        super().setUp()
+        self.chain = [TaskFactory(employee=self.employee)]
+        for _ in range(4):
+            self.chain.append(TaskFactory(employee=self.employee, parent_task=self.chain[-1]))
+        self.sibling = TaskFactory(employee=self.employee, parent_task=self.chain[1])
+
+    def test__tree(self):
+        """Тест: поддерево задачи с глубиной, ограниченное max_depth"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("employee_tasks:task-tree", args=[self.chain[1].pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["cycle"])
+
+        depths = {task["id"]: task["depth"] for task in response.data["results"]}
+        expected = {task.pk: depth for depth, task in enumerate(self.chain[1:])}
+        expected[self.sibling.pk] = 1
+        self.assertDictEqual(depths, expected)
+
+        response = self.client.get(reverse("employee_tasks:task-tree", args=[self.chain[1].pk]), {"max_depth": 1})
+        self.assertSetEqual(
+            {task["id"] for task in response.data["results"]}, {self.chain[1].pk, self.chain[2].pk, self.sibling.pk}
+        )
+
+    def test__ancestors(self):
+        """Тест: цепочка родительских задач"""
+        response = self.client.get(reverse("employee_tasks:task-ancestors", args=[self.chain[-1].pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [(task["id"], task["depth"]) for task in response.data["results"]],
+            [(task.pk, depth) for depth, task in enumerate(reversed(self.chain[:-1]), start=1)],
+        )
+
+    def test__cycle(self):
+        """Тест: цикл в иерархии обнаруживается, обход не зацикливается"""
+        Task.objects.filter(pk=self.chain[0].pk).update(parent_task=self.chain[-1])
+
+        response = self.client.get(reverse("employee_tasks:task-ancestors", args=[self.chain[2].pk]))
+        self.assertTrue(response.data["cycle"])
+        self.assertEqual(len(response.data["results"]), len(self.chain) - 1)
+
+        response = self.client.get(reverse("employee_tasks:task-tree", args=[self.chain[0].pk]))
+        self.assertTrue(response.data["cycle"])
+        self.assertEqual(len(response.data["results"]), len(self.chain) + 1)
+
+    def test__not_found_and_invalid_depth(self):
+        """Тест: несуществующая задача и неверная глубина"""
+        response = self.client.get(reverse("employee_tasks:task-tree", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(reverse("employee_tasks:task-tree", args=[self.chain[0].pk]), {"max_depth": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test__parent_task_cycle(self):
+        """Тест: нельзя сделать задачу родительской для её предка или для самой себя"""
+        root = self.chain[0]
+        for parent in (self.chain[-1], root):
+            data = {"title_task": root.title_task, "task_description": "description", "parent_task": parent.pk}
+            response = self.client.put(reverse("employee_tasks:task-detail", args=[root.pk]), data=data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("parent_task", response.data)
+
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_task)
+
+    def test__parent_task_max_depth(self):
+        """Тест: нельзя превысить максимальную глубину иерархии"""
+        url = reverse("employee_tasks:task-list")
+        with self.settings(TASK_MAX_DEPTH=len(self.chain)):
+            data = {"title_task": "leaf", "task_description": "description", "parent_task": self.chain[-1].pk}
+            with self.assertNumQueries(3):
+                response = self.client.post(url, data=data)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            data["parent_task"] = response.data["id"]
+            response = self.client.post(url, data=data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            # перенос задачи вместе с подзадачами тоже проверяет глубину
+            data = {"title_task": "root", "task_description": "description", "parent_task": self.sibling.pk}
+            response = self.client.put(reverse("employee_tasks:task-detail", args=[self.chain[2].pk]), data=data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def bulk_put(self, parents):
+        data = [
+            {"id": task.pk, "title_task": task.title_task, "task_description": "description", "parent_task": parent}
+            for task, parent in parents
+        ]
+        return self.client.put(reverse("employee_tasks:task-bulk"), data=data, format="json")
+
+    def test__bulk_parent_task_cycle(self):
+        """Тест: цикл из изменений нескольких строк одного массового изменения не сохраняется"""
+        first, second = TaskFactory.create_batch(2, employee=self.employee)
+        response = self.bulk_put([(first, second.pk), (second, first.pk), (self.chain[0], self.chain[-1].pk)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertListEqual([error["index"] for error in response.data["errors"]], [0, 1, 2])
+        self.assertIn("parent_task", response.data["errors"][0]["errors"])
+        self.assertFalse(Task.objects.filter(pk__in=[first.pk, second.pk], parent_task__isnull=False).exists())
+
+        # Перестановка задач местами - не цикл: старая связь заменяется новой из той же порции
+        response = self.bulk_put([(self.chain[1], self.chain[2].pk), (self.chain[2], self.chain[0].pk)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data["errors"], [])
+        self.chain[1].refresh_from_db()
+        self.assertEqual(self.chain[1].parent_task_id, self.chain[2].pk)
+
+    def test__bulk_parent_task_cycle_after_invalid_row(self):
+        """Тест: без строки с ошибкой у её задачи остаётся родительская задача из базы, и цикл всё равно найден"""
+        # chain[1] остаётся под chain[0], если её строка отклонена, и перенос chain[0] под chain[1] - цикл
+        data = [
+            {"id": self.chain[1].pk, "title_task": "", "task_description": "description", "parent_task": None},
+            {
+                "id": self.chain[0].pk,
+                "title_task": "root",
+                "task_description": "description",
+                "parent_task": self.chain[1].pk,
+            },
+        ]
+        response = self.client.put(reverse("employee_tasks:task-bulk"), data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title_task", response.data["errors"][0]["errors"])
+        self.assertIn("parent_task", response.data["errors"][1]["errors"])
+        self.chain[0].refresh_from_db()
+        self.assertIsNone(self.chain[0].parent_task_id)
+
+    def test__bulk_parent_task_max_depth(self):
+        """Тест: глубина проверяется по иерархии со всеми изменениями порции"""
+        first, second = TaskFactory.create_batch(2, employee=self.employee)
+        with self.settings(TASK_MAX_DEPTH=len(self.chain)):
+            # По отдельности каждая строка допустима, вместе вторая задача оказывается глубже максимума
+            response = self.bulk_put([(first, self.chain[-1].pk), (second, first.pk)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertListEqual([error["index"] for error in response.data["errors"]], [0, 1])
+        self.assertIn("parent_task", response.data["errors"][1]["errors"])
+
+    def test__bulk_parent_task_num_queries(self):
+        """Тест: иерархия для проверки parent_task загружается одним запросом на порцию"""
+        tasks = TaskFactory.create_batch(50, employee=self.employee)
+        # savepoint, задачи, родительские задачи, иерархия, изменение, освобождение savepoint
+        with self.assertNumQueries(6):
+            response = self.bulk_put([(task, self.chain[index % 5].pk) for index, task in enumerate(tasks)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.filter(parent_task=self.chain[0]).count(), 11)
+
+
+class CursorPaginationTests(BaseEmployeeTests):
+    """Тесты для курсорной пагинации"""
+
+    def walk_pages(self, url, page_size=2):
+        ids = []
+        response = self.client.get(url, {"cursor": "", "page_size": page_size})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            ids.extend(item["id"] for item in response.data["results"])
+            if response.data["next"] is None:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test__walk_tasks(self):
+        """Тест: курсорная пагинация задач выдаёт все задачи по одному разу в порядке списка"""
+        other_employee = EmployeeFactory()
+        TaskFactory.create_batch(3, employee=self.employee, title_task="same title")
+        TaskFactory.create_batch(2, employee=other_employee)
+        TaskFactory.create_batch(3, employee=None)
+
+        expected_ids = list(Task.objects.values_list("id", flat=True))
+        self.assertListEqual(self.walk_pages(reverse("employee_tasks:task-list")), expected_ids)
+
+    def test__walk_busy_employees(self):
+        """Тест: курсорная пагинация занятых сотрудников упорядочена по загруженности"""
+        for count_tasks, employee in enumerate(EmployeeFactory.create_batch(4)):
+            TaskFactory.create_batch(count_tasks % 2, employee=employee, status="in_progress")
+
+        expected_ids = list(Employee.objects.busy_employees().values_list("id", flat=True))
+        self.assertListEqual(self.walk_pages(reverse("employee_tasks:employee-busy")), expected_ids)
+
+    def test__deep_page_without_count(self):
+        """Тест: страница по курсору не считает общее количество строк"""
+        TaskFactory.create_batch(5, employee=self.employee)
+        response = self.client.get(reverse("employee_tasks:task-list"), {"cursor": "", "page_size": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data["next"])
+        # Версия данных для ETag и страница
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("COUNT", " ".join(query["sql"].upper() for query in queries))
+
+    def test__invalid_cursor(self):
+        """Тест: неверный курсор"""
+        response = self.client.get(reverse("employee_tasks:task-list"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test__cursor_with_wrong_types(self):
+        """Тест: курсор нужной длины со значениями не тех типов - ответ 404, а не ошибка сервера"""
+        cursors = {
+            "employee_tasks:task-list": ["x", "y", "z"],
+            "employee_tasks:employee-busy": ["x", "y"],
+            "employee_tasks:task-overdue": ["x", "y"],
+            "employee_tasks:task-due-soon": ["2026-10-18T12:00:00+00:00", [1]],
+        }
+        for name, position in cursors.items():
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            with self.subTest(name, position=position):
+                response = self.client.get(reverse(name), {"cursor": cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskCountersTests(TestCase):
+    """Тесты для счётчиков задач сотрудников"""
+
+    def setUp(self):
+        self.employee = EmployeeFactory()
+
+    def assertCounters(self, employee, **expected):
+        employee.refresh_from_db()
+        counters = {status: getattr(employee, field) for status, field in TASK_COUNTER_FIELDS.items()}
+        self.assertDictEqual(counters, {status: expected.get(status, 0) for status in TASK_COUNTER_FIELDS})
+
+    def test__counters_on_create_update_delete(self):
+        """Тест: счётчики меняются при создании, изменении статуса и удалении задачи"""
+        task = TaskFactory(employee=self.employee, status="pending")
+        TaskFactory(employee=self.employee, status="in_progress")
+        self.assertCounters(self.employee, pending=1, in_progress=1)
+
+        task.status = "in_progress"
+        task.save()
+        self.assertCounters(self.employee, in_progress=2)
+
+        task.delete()
+        self.assertCounters(self.employee, in_progress=1)
+
+    def test__counters_on_reassign(self):
+        """Тест: счётчики обоих сотрудников меняются при переназначении задачи"""
+        other_employee = EmployeeFactory()
+        task = TaskFactory(employee=self.employee, status="in_progress")
+
+        task.employee = other_employee
+        task.save()
+        self.assertCounters(self.employee)
+        self.assertCounters(other_employee, in_progress=1)
+
+        other_employee.delete()
+        task.refresh_from_db()
+        self.assertIsNone(task.employee)
+
+    def test__counters_on_bulk_operations(self):
+        """Тест: счётчики корректны после массовых операций"""
+        TaskFactory.create_batch(3, employee=self.employee, status="pending")
+        Task.objects.filter(employee=self.employee).update(status="completed")
+        self.assertCounters(self.employee, completed=3)
+
+        Task.objects.filter(employee=self.employee).delete()
+        self.assertCounters(self.employee)
+
+    def test__employee_save_keeps_counters(self):
+        """Тест: сохранение сотрудника не затирает счётчики устаревшими значениями"""
+        stale_employee = Employee.objects.get(pk=self.employee.pk)
+        TaskFactory(employee=self.employee, status="in_progress")
+
+        stale_employee.position = "manager"
+        stale_employee.save()
+        self.assertCounters(self.employee, in_progress=1)
+
+    def test__reconcile_task_counters(self):
+        """Тест: команда пересчёта исправляет расхождения в счётчиках"""
+        TaskFactory.create_batch(2, employee=self.employee, status="in_progress")
+        Employee.objects.filter(pk=self.employee.pk).update(active_tasks_count=10, canceled_tasks_count=1)
+
+        out = StringIO()
+        call_command("reconcile_task_counters", stdout=out)
+        self.assertIn("1", out.getvalue())
+        self.assertCounters(self.employee, in_progress=2)
+
+
+class ImportCommandsTests(TestCase):
+    """Тесты для команд загрузки сотрудников и задач из файлов"""
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile("w", suffix=suffix, encoding="utf-8", delete=False)
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test__import_employees_csv(self):
+        """Тест: загрузка сотрудников из CSV с разными режимами паролей"""
+        path = self.write_file(
+            ".csv",
+            "email,first_name,last_name,position,password\n"
+            "ivanov@example.com,Иван,Иванов,Разработчик,secret\n"
+            "petrov@example.com,Пётр,Петров,Аналитик,\n",
+        )
+        out = StringIO()
+        call_command("import_employees", path, stdout=out)
+        self.assertIn("Загружено сотрудников: 2", out.getvalue())
+
+        ivanov = Employee.objects.get(email="ivanov@example.com")
+        self.assertTrue(ivanov.check_password("secret"))
+        self.assertFalse(Employee.objects.get(email="petrov@example.com").has_usable_password())
+
+        Employee.objects.all().delete()
+        call_command("import_employees", path, passwords="skip", stdout=StringIO())
+        self.assertFalse(Employee.objects.get(email="ivanov@example.com").has_usable_password())
+
+    def test__import_employees_hashed_passwords(self):
+        """Тест: готовые хеши паролей сохраняются как есть, не хеши - ошибка"""
+        password = make_password("secret")
+        path = self.write_file(".ndjson", json.dumps({**EMPLOYEE_ROW, "password": password}) + "\n")
+        call_command("import_employees", path, passwords="hashed", stdout=StringIO())
+        self.assertEqual(Employee.objects.get().password, password)
+
+        path = self.write_file(".ndjson", json.dumps({**EMPLOYEE_ROW, "password": "secret"}) + "\n")
+        with self.assertRaises(CommandError):
+            call_command("import_employees", path, passwords="hashed", stdout=StringIO())
+
+    def test__import_tasks_with_parents(self):
+        """Тест: родительская задача связывается по external_id, даже если идёт в файле позже подзадачи"""
+        employee = EmployeeFactory(email="ivanov@example.com")
+        rows = [
+            {"external_id": "T-2", "title_task": "child", "task_description": "description", "parent_task": "T-1"},
+            {
+                "external_id": "T-1",
+                "title_task": "parent",
+                "task_description": "description",
+                "employee": "ivanov@example.com",
+                "status": "in_progress",
+                "deadline": "2030-01-01T12:00:00Z",
+            },
+            {"external_id": "T-3", "title_task": "orphan", "task_description": "description", "parent_task": "T-9"},
+        ]
+        path = self.write_file(".ndjson", "".join(json.dumps(row) + "\n" for row in rows))
+
+        out = StringIO()
+        call_command("import_tasks", path, chunk_size=2, stdout=out)
+        self.assertIn("Загружено задач: 3", out.getvalue())
+        self.assertIn("Не найдены родительские задачи: 1", out.getvalue())
+
+        parent = Task.objects.get(external_id="T-1")
+        self.assertEqual(Task.objects.get(external_id="T-2").parent_task, parent)
+        self.assertIsNone(Task.objects.get(external_id="T-3").parent_task)
+        self.assertEqual(parent.employee, employee)
+        self.assertEqual(parent.deadline, datetime(2030, 1, 1, 12, tzinfo=timezone.utc))
+
+        employee.refresh_from_db()
+        self.assertEqual(employee.active_tasks_count, 1)
+
+    def test__import_tasks_unknown_employee(self):
+        """Тест: неизвестный сотрудник прерывает загрузку с номером строки"""
+        path = self.write_file(".csv", "title_task,task_description,employee\ntask,description,nobody@example.com\n")
+        with self.assertRaisesMessage(CommandError, "Строка 1"):
+            call_command("import_tasks", path, stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+
+class BenchCommandsTests(TestCase):
+    """Тесты для команд синтетических данных и бенчмарка"""
+
+    def seed(self, **options):
+        call_command("seed_bench", employees=5, tasks=300, depth=5, chunk_size=100, stdout=StringIO(), **options)
+
+    @mock.patch("employee_tasks.management.commands.seed_bench.DEEP_CHAIN_RATIO", 0.05)
+    def test__seed_bench(self):
+        """Тест: сотрудники и задачи с цепочками подзадач, одинаковые данные при одинаковом seed"""
+        self.seed()
+        self.assertEqual(Employee.objects.filter(email__startswith="bench-").count(), 5)
+        self.assertEqual(Task.objects.count(), 300)
+        self.assertEqual(Task.objects.create(title_task="Новая", task_description="").pk, 301)
+
+        parents = dict(Task.objects.values_list("id", "parent_task_id"))
+        depths = {}
+        for task_id in parents:
+            depth, parent_id = 0, parents[task_id]
+            while parent_id is not None:
+                depth, parent_id = depth + 1, parents[parent_id]
+            depths[task_id] = depth
+        self.assertEqual(max(depths.values()), 5)
+
+        out = StringIO()
+        call_command("reconcile_task_counters", dry_run=True, stdout=out)
+        self.assertIn("Сотрудников с неверными счётчиками: 0", out.getvalue())
+
+        tasks = list(Task.objects.order_by("id").values_list("id", "title_task", "status", "parent_task_id"))
+        self.seed(clear=True)
+        self.assertEqual(Employee.objects.filter(email__startswith="bench-").count(), 5)
+        self.assertListEqual(
+            list(Task.objects.order_by("id").values_list("id", "title_task", "status", "parent_task_id")), tasks[:300]
+        )
+
+    def test__benchmark(self):
+        """Тест: результаты сохраняются в базовую линию, ухудшение метрик завершает команду ошибкой"""
+        self.seed()
+        baseline = os.path.join(tempfile.mkdtemp(), "baseline.json")
+        self.addCleanup(os.remove, baseline)
+
+        call_command("benchmark", iterations=2, warmup=0, baseline=baseline, save=True, stdout=StringIO())
+        with open(baseline) as file:
+            results = json.load(file)
+        self.assertEqual(results["dataset"], {"employees": 5, "tasks": 300})
+        self.assertEqual(len(results["scenarios"]), 9)
+        self.assertGreater(results["scenarios"]["task_list"]["queries"], 0)
+        # Без кеша ответов данные читаются из базы при каждом запросе, из кеша - нет
+        scenarios = results["scenarios"]
+        self.assertLess(scenarios["employee_busy_cached"]["queries"], scenarios["employee_busy"]["queries"])
+        self.assertLess(scenarios["task_important_cached"]["queries"], scenarios["task_important"]["queries"])
+
+        out = StringIO()
+        call_command("benchmark", iterations=2, warmup=0, baseline=baseline, tolerance=100, stdout=out)
+        self.assertIn("Метрики не хуже базовой линии", out.getvalue())
+
+        results["scenarios"]["task_list"]["queries"] = 0
+        with open(baseline, "w") as file:
+            json.dump(results, file)
+        with self.assertRaisesMessage(CommandError, "task_list: queries 0"):
+            call_command("benchmark", iterations=2, warmup=0, baseline=baseline, tolerance=100, stdout=StringIO())
+
+    def test__compression_bench(self):
+        """Тест: размер и время сжатия каждой кодировкой для ответа"""
+        self.seed()
+        out = StringIO()
+        call_command("compression_bench", scenario=["task_list"], page_size=20, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2 + 10)
+        self.assertEqual(lines[1].split()[:2], ["task_list", "identity"])
+        self.assertIn("zstd", lines[-1])
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """Тесты для команды нагрузочного теста"""
+
+    def test__load_test(self):
+        """Тест: все запросы к запущенному серверу выполняются, выводится количество запросов в секунду"""
+        employee = EmployeeFactory()
+        employee.set_password("Secret-password-1")
+        employee.save()
+
+        out = StringIO()
+        call_command(
+            "load_test",
+            f"{self.live_server_url}{reverse('employee_tasks:employee-list')}",
+            requests=20,
+            concurrency=4,
+            email=employee.email,
+            password="Secret-password-1",
+            stdout=out,
+        )
+        self.assertIn("Успешных запросов: 20", out.getvalue())
+        self.assertIn("Запросов в секунду", out.getvalue())
+
+    def test__load_test_without_credentials(self):
+        """Тест: если ни один запрос не выполнен успешно, команда завершается ошибкой с кодами ответов"""
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "Ни один запрос не выполнен успешно"):
+            call_command(
+                "load_test", f"{self.live_server_url}{reverse('employee_tasks:employee-list')}", requests=3, stdout=out
+            )
+        self.assertIn("401: 3", out.getvalue())
+
+
+class TaskIndexesTests(TestCase):
+    """Тесты: планировщик использует индексы для частых запросов к задачам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employees = EmployeeFactory.create_batch(20)
+        statuses = ["pending", "completed", "canceled", "completed", "pending"] * 99 + ["in_progress"] * 5
+        now = datetime.now(timezone.utc)
+        parents = Task.objects.bulk_create(
+            Task(title_task=f"parent {i}", task_description="", employee=employees[i % 20], status=status)
+            for i, status in enumerate(statuses)
+        )
+        Task.objects.bulk_create(
+            Task(
+                title_task=f"task {i}",
+                task_description="",
+                employee=employees[i % 20],
+                parent_task=parents[i % len(parents)] if i % 50 == 0 else None,
+                status=statuses[i % len(statuses)],
+                # Сроки у половины задач, часть из них просрочена: иначе частичные индексы сроков пусты
+                deadline=now + timedelta(days=i % 60 - 30) if i % 2 else None,
+            )
+            for i in range(5000)
+        )
+        with connection.cursor() as cursor:
+            # Статистика сотрудников тоже свежая: ANALYZE других тестов не откатывается вместе с транзакцией
+            cursor.execute(f"ANALYZE {Employee._meta.db_table}")
+            cursor.execute(f"ANALYZE {Task._meta.db_table}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn(f"Seq Scan on {Task._meta.db_table}", plan)
+
+    def test__in_progress_tasks_of_employees(self):
+        """Тест: задачи в работе для страницы занятых сотрудников"""
+        employee_ids = list(Employee.objects.values_list("id", flat=True)[:5])
+        queryset = Task.objects.filter(status="in_progress", employee_id__in=employee_ids)
+        self.assertUsesIndex(queryset, "task_in_progress_idx")
+
+    def test__important_tasks(self):
+        """Тест: важные задачи"""
+        self.assertUsesIndex(Task.objects.important(), "task_pending_subtask_idx")
+
+    def test__deadlines(self):
+        """Тест: просроченные задачи и их количество у сотрудников"""
+        self.assertUsesIndex(Task.objects.overdue().order_by("deadline", "id")[:20], "task_open_deadline_idx")
+        self.assertUsesIndex(Employee.objects.employees_with_count_tasks()[:20], "task_overdue_employee_idx")
+
+    def test__search(self):
+        """Тест: полнотекстовый поиск задач"""
+        query = SearchQuery("4242", config=TASK_SEARCH_CONFIG)
+        with connection.cursor() as cursor:
+            # Новые строки попадают в список ожидания GIN-индекса до очистки (autovacuum), и планировщик считает
+            # индекс дороже последовательного чтения
+            cursor.execute("SELECT gin_clean_pending_list('task_search_idx'::regclass)")
+        self.assertUsesIndex(Task.objects.filter(search_vector=query), "task_search_idx")
+
+    def test__workload_history(self):
+        """Тест: история загруженности сотрудника за период"""
+        employees = Employee.objects.all()
+        WorkloadSnapshot.objects.bulk_create(
+            WorkloadSnapshot(
+                employee=employee,
+                date=date(2024, 1, 1) + timedelta(days=days),
+                pending_tasks_count=0,
+                active_tasks_count=0,
+                completed_tasks_count=0,
+                canceled_tasks_count=0,
+                overdue_tasks_count=0,
+                created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            )
+            for employee in employees
+            for days in range(200)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {WorkloadSnapshot._meta.db_table}")
+
+        history = WorkloadSnapshot.objects.filter(
+            employee=employees[0], date__range=(date(2024, 3, 1), date(2024, 3, 31))
+        ).order_by("date")
+        self.assertUsesIndex(history, "workload_snapshot_employee_date_uniq")
+
+    def test__tasks_ordering(self):
+        """Тест: первая и глубокая страницы списка задач"""
+        self.assertUsesIndex(Task.objects.all()[:20], "task_ordering_idx")
+
+        task = Task.objects.all()[3000]
+        ordering = TaskViewSet.cursor_ordering
+        position = [task.employee_id, task.title_task, task.id]
+        paginator = EmployeeTaskCursorPaginator
+        deep_page = Task.objects.filter(
+            paginator.get_anchor(ordering[0], position[0]) & paginator.get_after(ordering, position)
+        )[:20]
+        self.assertUsesIndex(deep_page, "task_ordering_idx")
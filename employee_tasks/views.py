@@ -1,56 +1,334 @@
-from django.db.models import Q
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, viewsets
+from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from employee_tasks.filters import EmployeeTaskFilter
-from employee_tasks.models import Employee, Task
-from employee_tasks.paginators import EmployeeTaskPaginator
+from employee_tasks.cache import ConditionalGetMixin, ResponseCacheMixin
+from employee_tasks.events import EventStreamUnavailable, stream_events
+from employee_tasks.fieldsets import SparseFieldsetMixin
+from employee_tasks.filters import EmployeeSearchFilter, EmployeeTaskFilter, TaskSearchFilter
+from employee_tasks.instrumentation import RequestProfilingMixin
+from employee_tasks.models import Employee, Task, WorkloadSnapshot
+from employee_tasks.paginators import CursorPaginationMixin, EmployeeTaskCursorPaginator, EmployeeTaskPaginator
+from employee_tasks.renderers import CSVRenderer, EventStreamRenderer, NDJSONRenderer, is_asgi
+from employee_tasks.routers import ReplicaReadMixin
 from employee_tasks.serializer import (BusyEmployeeSerializer, EmployeeCreateSerializer, EmployeeSerializer,
-                                       TaskSerializer)
+                                       TaskAssignmentSerializer, TaskSerializer, TaskStatusTransitionSerializer,
+                                       TaskTreeSerializer, WorkloadSnapshotSerializer)
+from employee_tasks.services import (assign_tasks, bulk_save_tasks, bulk_set_status, decode_sync_token,
+                                     encode_sync_token, task_changes)
+
+# Количество строк, которые выгрузка читает из серверного курсора за один раз
+EXPORT_CHUNK_SIZE = 2000
+
+# Количество изменённых и удалённых задач в одном ответе /task/changes/ (по умолчанию и максимум)
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
 
+# Период истории загруженности по умолчанию и максимальный период одного запроса, в днях
+WORKLOAD_HISTORY_DAYS = 90
+WORKLOAD_HISTORY_MAX_DAYS = 366
 
-class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
+# Период для /task/due-soon/ (параметр within: число и единица m, h, d или w) по умолчанию и максимальный
+DUE_SOON_WITHIN = "24h"
+DUE_SOON_MAX_WITHIN = timedelta(days=90)
+WITHIN_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+class EmployeeViewSet(
+    RequestProfilingMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    CursorPaginationMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet для сотрудников"""
 
     serializer_class = EmployeeSerializer
     pagination_class = EmployeeTaskPaginator
+    cursor_ordering = ("last_name", "id")
+    cached_actions = ("list", "busy")
+    conditional_actions = ("busy",)
+    replica_actions = ("list", "retrieve", "busy", "busy_export", "workload_history")
     queryset = Employee.objects.employees_with_count_tasks()
     permission_classes = [IsAuthenticated]
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, EmployeeSearchFilter)
     filterset_class = EmployeeTaskFilter
 
     @action(
         detail=False,
         serializer_class=BusyEmployeeSerializer,
-        queryset=Employee.objects.employees_with_count_tasks().order_by("-active_tasks_count"),
+        queryset=Employee.objects.busy_employees(),
+        cursor_ordering=("-active_tasks_count", "id"),
     )
     def busy(self, request):
         """Получаем список сотрудников с количеством активных задач"""
         return super().list(request)
 
+    @action(
+        detail=False,
+        url_path="busy/export",
+        queryset=Employee.objects.employees_with_count_tasks().order_by("-active_tasks_count", "id"),
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        pagination_class=None,
+    )
+    def busy_export(self, request):
+        """Выгрузка загруженности сотрудников потоком в NDJSON (по умолчанию) или CSV (?format=csv)"""
+        header = (
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "position",
+            "active_tasks_count",
+            "pending_tasks_count",
+            "completed_tasks_count",
+            "canceled_tasks_count",
+            "overdue_tasks_count",
+        )
+        rows = self.get_queryset().values_list(*header).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return request.accepted_renderer.streaming_response(rows, header, "busy_employees", is_asgi(request))
+
+    @action(
+        detail=True,
+        url_path="workload-history",
+        serializer_class=WorkloadSnapshotSerializer,
+        pagination_class=None,
+    )
+    def workload_history(self, request, pk=None):
+        """История загруженности сотрудника по дням за период date_from - date_to (по умолчанию 90 дней)"""
+        employee = self.get_object()
+        date_to = self.get_date_param("date_to", timezone.localdate())
+        date_from = self.get_date_param("date_from", date_to - timedelta(days=WORKLOAD_HISTORY_DAYS - 1))
+        if date_from > date_to:
+            raise ValidationError({"date_from": "Должна быть не позже date_to"})
+        if (date_to - date_from).days >= WORKLOAD_HISTORY_MAX_DAYS:
+            raise ValidationError({"date_from": f"Период не может быть больше {WORKLOAD_HISTORY_MAX_DAYS} дней"})
+
+        snapshots = WorkloadSnapshot.objects.using(self.read_database).filter(
+            employee=employee, date__range=(date_from, date_to)
+        )
+        return Response(
+            {
+                "employee": employee.pk,
+                "date_from": date_from,
+                "date_to": date_to,
+                "results": self.get_serializer(snapshots.order_by("date"), many=True).data,
+            }
+        )
 
-class TaskViewSet(viewsets.ModelViewSet):
+    def get_date_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ValidationError({name: "Ожидается дата в формате ГГГГ-ММ-ДД"})
+        return date
+
+
+class TaskViewSet(
+    RequestProfilingMixin,
+    SparseFieldsetMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet для задач"""
 
     serializer_class = TaskSerializer
     pagination_class = EmployeeTaskPaginator
+    cursor_ordering = ("employee_id", "title_task", "id")
+    cached_actions = ("important",)
+    conditional_actions = ("list", "retrieve", "important")
+    replica_actions = ("list", "retrieve", "important", "export", "overdue", "due_soon")
+    sparse_actions = ("list", "retrieve", "important", "overdue", "due_soon")
+    values_actions = ("list", "important", "overdue", "due_soon")
     queryset = Task.objects.all()
+    filter_backends = (DjangoFilterBackend, TaskSearchFilter)
     permission_classes = [IsAuthenticated]
     http_method_names = ["get", "post", "delete", "put"]
 
     @action(
         detail=False,
-        queryset=Task.objects.filter(
-            Q(status="pending") & Q(parent_task__isnull=False) & Q(parent_task__status="in_progress")
-        ).all(),
+        queryset=Task.objects.important(),
         serializer_class=TaskSerializer,
     )
     def important(self, request):
         """Получаем важные задачи, которые не взяты в работу"""
         return super().list(request)
 
+    @action(
+        detail=False,
+        queryset=Task.objects.overdue(),
+        pagination_class=EmployeeTaskCursorPaginator,
+        cursor_ordering=("deadline", "id"),
+    )
+    def overdue(self, request):
+        """Незавершённые задачи с прошедшим сроком, начиная с самых давних (курсорная пагинация)"""
+        return super().list(request)
+
+    @action(
+        detail=False,
+        url_path="due-soon",
+        pagination_class=EmployeeTaskCursorPaginator,
+        cursor_ordering=("deadline", "id"),
+    )
+    def due_soon(self, request):
+        """Незавершённые задачи, срок которых наступит в ближайшие within (например, 48h), по сроку"""
+        self.queryset = Task.objects.due_soon(self.get_within())
+        return super().list(request)
+
+    @action(
+        detail=False,
+        url_path="important/assignments",
+        queryset=Task.objects.important(),
+        serializer_class=TaskAssignmentSerializer,
+        pagination_class=None,
+    )
+    def important_assignments(self, request):
+        """Получаем важные задачи со сроком и сотрудниками, которые могут их взять"""
+        serializer = self.get_serializer(assign_tasks(self.get_queryset()), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer], pagination_class=None)
+    def export(self, request):
+        """Выгрузка всех задач потоком в NDJSON (по умолчанию) или CSV (?format=csv)"""
+        # Вычисляемые столбцы (поисковый вектор) не выгружаются
+        columns = {field.attname: field.name for field in Task._meta.concrete_fields if not field.generated}
+        rows = self.get_queryset().values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        header = tuple(columns.values())
+        return request.accepted_renderer.streaming_response(rows, header, "tasks", is_asgi(request))
+
+    @action(detail=False, renderer_classes=[EventStreamRenderer], pagination_class=None)
+    def events(self, request):
+        """Поток событий задач (server-sent events).
+
+        task - задача создана, изменена или удалена; workload - изменились счётчики задач сотрудника;
+        reset - данные изменились массово или часть событий потеряна, их нужно перечитать.
+        Под WSGI-сервером (runserver, APP_SERVER=wsgi) отвечает 501.
+        """
+        if not is_asgi(request):
+            raise EventStreamUnavailable()
+        response = StreamingHttpResponse(stream_events(), content_type="text/event-stream; charset=utf-8")
+        response["Cache-Control"] = "no-cache"
+        # Не буферизовать поток на прокси nginx
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(detail=False, methods=["post", "put"], pagination_class=None)
+    def bulk(self, request):
+        """Массовое создание (POST) и изменение (PUT, с id в каждой задаче) задач с ошибками по строкам"""
+        if not isinstance(request.data, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ["Ожидается список задач"]})
+
+        update = request.method == "PUT"
+        saved, errors = bulk_save_tasks(request.data, self.get_serializer_context(), update=update)
+
+        if errors and not saved:
+            status_code = status.HTTP_400_BAD_REQUEST
+        else:
+            status_code = status.HTTP_200_OK if update else status.HTTP_201_CREATED
+        results = [{"index": index, "id": task.pk} for index, task in saved]
+        return Response({"results": results, "errors": errors}, status=status_code)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-status",
+        serializer_class=TaskStatusTransitionSerializer,
+        pagination_class=None,
+    )
+    def bulk_status(self, request):
+        """Массовая смена статуса задач: {"ids": [...], "status": "completed"}"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, not_found = bulk_set_status(serializer.validated_data["ids"], serializer.validated_data["status"])
+        return Response({"updated": updated, "not_found": not_found})
+
+    @action(detail=False, pagination_class=None)
+    def changes(self, request):
+        """Задачи, изменённые после токена since, и id удалённых задач (без since - все задачи)"""
+        since = request.query_params.get("since")
+        try:
+            position = decode_sync_token(since) if since else None
+        except ValueError as error:
+            raise ValidationError({"since": str(error)})
+
+        page_size = request.query_params.get("page_size", CHANGES_PAGE_SIZE)
+        try:
+            page_size = min(int(page_size), CHANGES_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({"page_size": "Должно быть целым числом"})
+        if page_size < 1:
+            raise ValidationError({"page_size": "Должно быть положительным числом"})
+
+        tasks, deleted, position, has_more = task_changes(position, page_size)
+        return Response(
+            {
+                "since": encode_sync_token(position),
+                "has_more": has_more,
+                "results": self.get_serializer(tasks, many=True).data,
+                "deleted": deleted,
+            }
+        )
+
+    @action(detail=True, serializer_class=TaskTreeSerializer, pagination_class=None)
+    def tree(self, request, pk=None):
+        """Получаем задачу со всеми подзадачами (параметр max_depth ограничивает глубину)"""
+        return self.hierarchy_response(Task.objects.subtree, pk)
+
+    @action(detail=True, serializer_class=TaskTreeSerializer, pagination_class=None)
+    def ancestors(self, request, pk=None):
+        """Получаем цепочку родительских задач (параметр max_depth ограничивает глубину)"""
+        return self.hierarchy_response(Task.objects.ancestors, pk, include_self=False)
+
+    def get_max_depth(self):
+        max_depth = self.request.query_params.get("max_depth", settings.TASK_MAX_DEPTH)
+        try:
+            max_depth = int(max_depth)
+        except ValueError:
+            raise ValidationError({"max_depth": "Должно быть целым числом"})
+        if max_depth < 0:
+            raise ValidationError({"max_depth": "Должно быть неотрицательным числом"})
+        return min(max_depth, settings.TASK_MAX_DEPTH)
+
+    def get_within(self):
+        within = self.request.query_params.get("within", DUE_SOON_WITHIN)
+        match = re.fullmatch(r"(\d+)([mhdw])", within)
+        if match is None:
+            raise ValidationError({"within": "Ожидается число и единица m, h, d или w, например 48h"})
+        within = timedelta(**{WITHIN_UNITS[match[2]]: int(match[1])})
+        if not timedelta(0) < within <= DUE_SOON_MAX_WITHIN:
+            raise ValidationError({"within": f"Должен быть больше нуля и не больше {DUE_SOON_MAX_WITHIN.days} дней"})
+        return within
+
+    def hierarchy_response(self, walk, pk, include_self=True):
+        tasks = list(walk(int(pk), self.get_max_depth())) if str(pk).isdigit() else []
+        if not tasks:
+            raise NotFound()
+
+        results = [task for task in tasks if not task.cycle and (include_self or task.depth)]
+        serializer = self.get_serializer(results, many=True)
+        return Response({"cycle": any(task.cycle for task in tasks), "results": serializer.data})
+
+
 class EmployeeCreateView(generics.CreateAPIView):
     queryset = Employee.objects.all()
     serializer_class = EmployeeCreateSerializer
@@ -32,6 +32,9 @@ set -e
 echo "Применение миграций базы данных"
 python manage.py migrate
 
+# Таблицы кешей с бэкендом DatabaseCache (например, REPLICA_PIN_CACHE_BACKEND); для остальных бэкендов ничего не делает
+python manage.py createcachetable
+
 # Создание суперпользователя, если он не существует
 echo "Создание суперпользователя, если его нет"
 
@@ -53,6 +56,18 @@ else:
     print('Переменные окружения для суперпользователя не установлены')
 END
 
-# Запуск сервера
-python manage.py runserver 0.0.0.0:8000
+# Запуск сервера: runserver - сервер разработки (по умолчанию), wsgi или asgi - gunicorn (config/gunicorn.conf.py)
+case "${APP_SERVER:-runserver}" in
+  wsgi)
+    exec gunicorn -c config/gunicorn.conf.py
+    ;;
+  asgi)
+    # Под ASGI запросы выполняются в разных потоках, постоянные соединения с базой не переиспользуются
+    export CONN_MAX_AGE="${CONN_MAX_AGE:-0}"
+    exec gunicorn -c config/gunicorn.conf.py
+    ;;
+  *)
+    python manage.py runserver 0.0.0.0:8000
+    ;;
+esac
 exec "$@"
\ No newline at end of file